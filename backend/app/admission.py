@@ -0,0 +1,162 @@
+"""
+Admission Control
+Per-route-class concurrency limits with bounded queues, shedding load with
+503 responses before requests pile up waiting for database connections.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+
+from . import instrumentation
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the service-time moving average
+SERVICE_TIME_SMOOTHING = 0.2
+
+@dataclass(frozen=True)
+class RouteClass:
+    """Admission policy shared by a group of routes."""
+    name: str
+    paths: Tuple[str, ...]  # Path prefixes belonging to this class
+    max_concurrency: int  # Requests processed at once
+    max_queue: int  # Requests allowed to wait for a slot
+    max_wait: float  # Seconds a request may wait before being shed
+    initial_service_time: float = 0.05  # Seconds, until real timings are observed
+
+class _Limiter:
+    """Concurrency slots and FIFO wait queue for one route class."""
+
+    def __init__(self, route_class: RouteClass):
+        self.route_class = route_class
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.service_time = route_class.initial_service_time
+
+    def estimated_wait(self, position: int) -> float:
+        """Expected seconds until the request at a queue position gets a slot."""
+        return position * self.service_time / self.route_class.max_concurrency
+
+    async def acquire(self) -> Optional[str]:
+        """
+        Wait for a slot.
+
+        Returns:
+            None when admitted, otherwise the rejection reason
+        """
+        policy = self.route_class
+        if self.in_flight < policy.max_concurrency and not self.waiters:
+            self.in_flight += 1
+            return None
+        if len(self.waiters) >= policy.max_queue:
+            return "queue_full"
+        if self.estimated_wait(len(self.waiters) + 1) > policy.max_wait:
+            return "deadline"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=policy.max_wait)
+            return None
+        except asyncio.TimeoutError:
+            if waiter.done():
+                return None  # Slot handed over just as the deadline passed
+            waiter.cancel()
+            self.waiters.remove(waiter)
+            return "timeout"
+        except asyncio.CancelledError:
+            # Client went away; give back a slot that may already have been handed over
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)
+            else:
+                waiter.cancel()
+                self.waiters.remove(waiter)
+            raise
+
+    def release(self, service_time: Optional[float]) -> None:
+        """Free a slot, handing it directly to the oldest live waiter."""
+        if service_time is not None:
+            self.service_time += SERVICE_TIME_SMOOTHING * (service_time - self.service_time)
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)  # Slot transfers; in_flight is unchanged
+                return
+        self.in_flight -= 1
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware enforcing route-class admission policies.
+
+    Requests whose path matches no class pass through untouched. Rejected
+    requests receive 503 with a Retry-After estimate, and every decision is
+    counted in the ``admission`` instrumentation section.
+    """
+
+    def __init__(self, app, route_classes: List[RouteClass]):
+        self.app = app
+        self.route_classes = route_classes
+        self.limiters: Dict[str, _Limiter] = {rc.name: _Limiter(rc) for rc in route_classes}
+        instrumentation.register_stats_provider("admission", self.stats)
+
+    def stats(self) -> dict:
+        """Current in-flight and queued requests per route class."""
+        live = {}
+        for name, limiter in self.limiters.items():
+            live[f"{name}.in_flight"] = limiter.in_flight
+            live[f"{name}.queued"] = len(limiter.waiters)
+            live[f"{name}.service_time_ms"] = round(limiter.service_time * 1000, 2)
+        return live
+
+    def match(self, path: str) -> Optional[RouteClass]:
+        """Find the route class whose path prefix matches the request path."""
+        for route_class in self.route_classes:
+            if path.startswith(route_class.paths):
+                return route_class
+        return None
+
+    async def __call__(self, scope, receive, send):
+        route_class = self.match(scope["path"]) if scope["type"] == "http" else None
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters[route_class.name]
+        queued_at = time.perf_counter()
+        rejection = await limiter.acquire()
+        queue_wait = time.perf_counter() - queued_at
+        instrumentation.increment("admission", f"{route_class.name}.{rejection or 'admitted'}")
+        instrumentation.increment("admission", f"{route_class.name}.queue_wait_seconds", queue_wait)
+
+        if rejection:
+            logger.debug(f"Shed {scope['path']} ({route_class.name}): {rejection}")
+            await self.__reject(send, limiter, rejection)
+            return
+
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started_at)
+
+    @staticmethod
+    async def __reject(send, limiter: _Limiter, reason: str) -> None:
+        """Send a 503 response advising when to retry."""
+        retry_after = max(1, math.ceil(limiter.estimated_wait(len(limiter.waiters) + 1)))
+        body = json.dumps({"detail": "Service overloaded, please retry", "reason": reason}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,268 @@
+"""
+Reading Analytics Snapshot
+Exports reading events joined with book attributes into memory-mapped NumPy
+columns and answers aggregate questions with vectorized group-bys, keeping
+analytical scans off the live SQLite database.
+
+Usage:
+    python -m app.analytics --output ./analytics_snapshot
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .models import Author, Book, book_readers
+
+logger = logging.getLogger(__name__)
+
+# Snapshot Configuration
+SNAPSHOT_DIR = os.getenv("ANALYTICS_SNAPSHOT_DIR", "./analytics_snapshot")
+SNAPSHOT_COLUMNS = {
+    "reader_id": np.int32,
+    "book_id": np.int32,
+    "author_id": np.int32,  # -1 when the book has no author
+    "genre": np.int16,  # Index into the metadata genre dictionary
+    "month": np.int32,  # year * 12 + (month - 1); -1 when read_at is unknown
+    "pages": np.int32,
+    "reading_time": np.int32,
+}
+METADATA_FILE = "metadata.json"
+CURRENT_FILE = "CURRENT"  # Names the live version subdirectory
+VERSION_PREFIX = "v"
+EXPORT_BATCH_SIZE = 100_000
+
+def build_snapshot(db: Session, directory: str = SNAPSHOT_DIR) -> dict:
+    """
+    Export all reading events into a columnar snapshot directory.
+
+    Rows are streamed in batches into preallocated memory-mapped arrays, so
+    memory use stays bounded regardless of table size. Each build writes a
+    new version subdirectory and then atomically replaces the CURRENT pointer
+    file, so readers always see either the previous or the new snapshot. The
+    previous version is kept for readers that resolved it just before the
+    swap; older ones are deleted.
+
+    Args:
+        db: Database session
+        directory: Destination directory for the snapshot
+
+    Returns:
+        Snapshot metadata (row count, genre dictionary, author names, build time)
+    """
+    started_at = time.perf_counter()
+    version = f"{VERSION_PREFIX}{time.time_ns()}"
+    building_dir = os.path.join(directory, version)
+    os.makedirs(building_dir)
+    try:
+        metadata = _export(db, building_dir)
+    except BaseException:
+        shutil.rmtree(building_dir, ignore_errors=True)
+        raise
+
+    pointer_tmp = os.path.join(directory, f"{CURRENT_FILE}.{version}.tmp")
+    with open(pointer_tmp, "w") as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(directory, CURRENT_FILE))
+    _prune_versions(directory, version)
+    logger.info(f"Built analytics snapshot with {metadata['row_count']} rows in {time.perf_counter() - started_at:.1f}s")
+    return metadata
+
+def _export(db: Session, building_dir: str) -> dict:
+    """Write the snapshot columns and metadata into a fresh version directory."""
+    row_count = db.execute(select(func.count()).select_from(book_readers)).scalar_one()
+    columns = {
+        name: np.lib.format.open_memmap(os.path.join(building_dir, f"{name}.npy"), mode="w+", dtype=dtype, shape=(row_count,))
+        for name, dtype in SNAPSHOT_COLUMNS.items()
+    }
+
+    genre_codes: Dict[Optional[str], int] = {}
+    events = (
+        select(
+            book_readers.c.reader_id, book_readers.c.book_id, Book.author_id,
+            Book.genre, book_readers.c.read_at, Book.pages, Book.reading_time,
+        )
+        .join(Book, Book.id == book_readers.c.book_id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    offset = 0
+    for batch in db.execute(events).partitions():
+        # Stop at the counted size in case rows were inserted mid-export
+        batch = batch[:row_count - offset]
+        if not batch:
+            break
+        end = offset + len(batch)
+        reader_ids, book_ids, author_ids, genres, read_ats, pages, reading_times = zip(*batch)
+        columns["reader_id"][offset:end] = reader_ids
+        columns["book_id"][offset:end] = book_ids
+        columns["author_id"][offset:end] = [-1 if a is None else a for a in author_ids]
+        columns["genre"][offset:end] = [genre_codes.setdefault(g, len(genre_codes)) for g in genres]
+        columns["month"][offset:end] = [-1 if r is None else r.year * 12 + r.month - 1 for r in read_ats]
+        columns["pages"][offset:end] = [p or 0 for p in pages]
+        columns["reading_time"][offset:end] = [t or 0 for t in reading_times]
+        offset = end
+
+    for column in columns.values():
+        column.flush()
+    del columns
+
+    metadata = {
+        "row_count": offset,
+        "genres": [genre or "Unknown" for genre in genre_codes],
+        "authors": {str(author_id): name for author_id, name in db.execute(select(Author.id, Author.name))},
+        "built_at": datetime.utcnow().isoformat(),
+    }
+    with open(os.path.join(building_dir, METADATA_FILE), "w") as f:
+        json.dump(metadata, f)
+    return metadata
+
+def _prune_versions(directory: str, current: str) -> None:
+    """Delete versions older than the one before ``current``, plus legacy top-level files."""
+    versions = sorted(
+        (name for name in os.listdir(directory)
+         if name.startswith(VERSION_PREFIX) and name[len(VERSION_PREFIX):].isdigit()),
+        key=lambda name: int(name[len(VERSION_PREFIX):]),
+    )
+    for name in versions[:-2]:
+        if name != current:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    # Snapshots from before versioning kept their files directly in the directory
+    for name in [METADATA_FILE, *(f"{column}.npy" for column in SNAPSHOT_COLUMNS)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+class ReadingSnapshot:
+    """Read-only, memory-mapped view over a snapshot directory."""
+
+    def __init__(self, directory: str = SNAPSHOT_DIR):
+        with open(os.path.join(directory, METADATA_FILE)) as f:
+            self.metadata = json.load(f)
+        count = self.metadata["row_count"]
+        # Arrays may be longer than row_count when the table shrank during export
+        self.columns = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")[:count]
+            for name in SNAPSHOT_COLUMNS
+        }
+        self.genres: List[str] = self.metadata["genres"]
+        self.built_at: str = self.metadata["built_at"]
+
+    def reads_per_genre_per_month(self) -> List[dict]:
+        """Count reads grouped by genre and calendar month."""
+        months = self.columns["month"]
+        known = months >= 0
+        months, genres = months[known], self.columns["genre"][known]
+        if not len(months):
+            return []
+        first_month = int(months.min())
+        span = int(months.max()) - first_month + 1
+        counts = np.bincount(genres.astype(np.int64) * span + (months - first_month), minlength=len(self.genres) * span)
+        return [
+            {
+                "genre": self.genres[key // span],
+                "month": _format_month(first_month + key % span),
+                "reads": int(counts[key]),
+            }
+            for key in np.flatnonzero(counts)
+        ]
+
+    def reading_time_totals(self) -> dict:
+        """Sum estimated reading time overall and per genre."""
+        per_genre = np.bincount(self.columns["genre"], weights=self.columns["reading_time"], minlength=len(self.genres))
+        return {
+            "total_reading_time": int(per_genre.sum()),
+            "by_genre": {genre: int(total) for genre, total in zip(self.genres, per_genre)},
+        }
+
+    def pages_per_reader(self, limit: int = 100) -> List[dict]:
+        """Rank readers by total pages read."""
+        reader_ids = self.columns["reader_id"]
+        if not len(reader_ids):
+            return []
+        pages = np.bincount(reader_ids, weights=self.columns["pages"])
+        books = np.bincount(reader_ids)
+        top = _top_indices(pages, limit)
+        return [
+            {"reader_id": int(reader_id), "pages_read": int(pages[reader_id]), "books_read": int(books[reader_id])}
+            for reader_id in top
+        ]
+
+    def author_market_share(self, limit: int = 100) -> List[dict]:
+        """Rank authors by their share of all reads."""
+        author_ids = self.columns["author_id"]
+        author_ids = author_ids[author_ids >= 0]
+        if not len(author_ids):
+            return []
+        reads = np.bincount(author_ids)
+        total = reads.sum()
+        names = self.metadata["authors"]
+        return [
+            {
+                "author_id": int(author_id),
+                "author_name": names.get(str(author_id)),
+                "reads": int(reads[author_id]),
+                "share": float(reads[author_id] / total),
+            }
+            for author_id in _top_indices(reads, limit)
+        ]
+
+# Snapshot cache keyed by directory, refreshed when the metadata file changes
+_loaded_snapshots: Dict[str, tuple] = {}
+
+def load_snapshot(directory: str = SNAPSHOT_DIR) -> Optional[ReadingSnapshot]:
+    """
+    Return the current snapshot in a directory, reusing mappings until it is rebuilt.
+
+    Returns:
+        ReadingSnapshot, or None if no snapshot has been built
+    """
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    cached = _loaded_snapshots.get(directory)
+    if cached and cached[0] == version:
+        return cached[1]
+    snapshot = ReadingSnapshot(os.path.join(directory, version))
+    _loaded_snapshots[directory] = (version, snapshot)
+    return snapshot
+
+def _format_month(month_index: int) -> str:
+    """Convert a year * 12 + month index back to YYYY-MM."""
+    return f"{month_index // 12:04d}-{month_index % 12 + 1:02d}"
+
+def _top_indices(values: np.ndarray, limit: int) -> np.ndarray:
+    """Indices of the largest non-zero values, descending, ties by lower index."""
+    candidates = np.flatnonzero(values)
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(-values[candidates], limit - 1)[:limit]]
+    return candidates[np.lexsort((candidates, -values[candidates]))]
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command-line entry point."""
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=SNAPSHOT_DIR, help="Snapshot directory")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        build_snapshot(db, args.output)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
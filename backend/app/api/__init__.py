@@ -4,29 +4,102 @@ Primary application file defining API routes, middleware, and lifecycle manageme
 """
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
-from typing import List
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from typing import List, Optional
 import logging
+import os
 
-from ..database import get_db, create_tables
-from .. import schemas, crud, models
+from ..database import get_db, create_tables, SessionLocal, POOL_SIZE, POOL_MAX_OVERFLOW
+from .. import schemas, crud, analytics
+from ..readmodels import ReaderRow
 from ..seed import seed_database
+from .. import instrumentation
+from ..instrumentation import QueryCountMiddleware
+from ..singleflight import SingleFlight
+from ..admission import AdmissionControlMiddleware, RouteClass
+from ..scheduler import PrecomputeScheduler, RefreshJob
+from ..profiling import ProfilingMiddleware, RequestProfiler
 
 # Configuration
 logger = logging.getLogger(__name__)
 HARDCODED_READER_ID = 1  # Temporary authentication simulation
 
+# Expensive community-wide queries shared by concurrent dashboard requests.
+# SHARED_QUERY_TTL caches results; SHARED_QUERY_STALE_TTL serves the previous
+# result for that much longer while one background refresh runs.
+shared_queries = SingleFlight(
+    session_factory=SessionLocal,
+    ttl=float(os.getenv("SHARED_QUERY_TTL", "0")),
+    stale_ttl=float(os.getenv("SHARED_QUERY_STALE_TTL", "0")),
+)
+instrumentation.register_stats_provider("shared_queries", lambda: dict(shared_queries.stats))
+
+def _popular_books(db: Session) -> List[schemas.Book]:
+    """Serialized most popular books, safe to share across requests."""
+    return [schemas.Book.model_validate(book) for book in crud.get_most_popular_books(db)]
+
+def _popular_author(db: Session) -> Optional[schemas.Author]:
+    """Serialized most popular author, safe to share across requests."""
+    author = crud.get_most_popular_author(db)
+    return schemas.Author.model_validate(author) if author else None
+
+def _trending_books(db: Session) -> List[schemas.Book]:
+    """Serialized books with the most recent reads."""
+    return [schemas.Book.model_validate(book) for book in crud.get_trending_books(db)]
+
+def _genre_counts(db: Session) -> List[schemas.GenreCount]:
+    """Serialized per-genre book and read counts."""
+    return [schemas.GenreCount(**counts) for counts in crud.get_genre_counts(db)]
+
+# Global aggregates refreshed in the background (started in lifespan unless
+# PRECOMPUTE_ENABLED=0); handlers fall back to on-demand computation until ready.
+PRECOMPUTE_INTERVAL = float(os.getenv("PRECOMPUTE_INTERVAL", "60"))
+precomputed = PrecomputeScheduler(
+    session_factory=SessionLocal,
+    jobs=[
+        RefreshJob("most_popular_books", _popular_books, interval=PRECOMPUTE_INTERVAL),
+        RefreshJob("most_popular_author", _popular_author, interval=PRECOMPUTE_INTERVAL),
+        RefreshJob("genre_counts", _genre_counts, interval=PRECOMPUTE_INTERVAL),
+        RefreshJob("trending_books", _trending_books, interval=PRECOMPUTE_INTERVAL),
+    ],
+    version_fn=crud.get_data_version,
+    check_interval=float(os.getenv("PRECOMPUTE_CHECK_INTERVAL", "2")),
+)
+instrumentation.register_stats_provider("precompute", precomputed.stats)
+
+def _precomputed(db: Session, name: str, compute):
+    """Read a precomputed aggregate, computing it (coalesced) if not yet available."""
+    if precomputed.has(name):
+        return precomputed.get(name)
+    return shared_queries.call(db, compute)
+
+# Admission control sized from the DB connection pool. One connection is kept
+# free per background session (precompute jobs, the data version check and,
+# with a stale TTL, single-flight refreshes); the rest is split between route
+# classes so admitted requests never queue inside the pool itself.
+POOL_CAPACITY = POOL_SIZE + POOL_MAX_OVERFLOW
+BACKGROUND_DB_SESSIONS = len(precomputed.jobs) + 1 + (len(precomputed.jobs) if shared_queries.stale_ttl else 0)
+REQUEST_DB_SLOTS = max(2, POOL_CAPACITY - BACKGROUND_DB_SESSIONS)
+HEAVY_DB_SLOTS = max(1, REQUEST_DB_SLOTS // 3)  # Aggregates over all reads
+CHEAP_DB_SLOTS = REQUEST_DB_SLOTS - HEAVY_DB_SLOTS  # Paginated and per-reader lookups
+ADMISSION_ROUTE_CLASSES = [
+    RouteClass(name="heavy", paths=("/dashboardData", "/authors/", "/genres/"),
+               max_concurrency=HEAVY_DB_SLOTS, max_queue=4 * HEAVY_DB_SLOTS, max_wait=2.0),
+    RouteClass(name="cheap", paths=("/books/", "/readers/", "/health"),
+               max_concurrency=CHEAP_DB_SLOTS, max_queue=4 * CHEAP_DB_SLOTS, max_wait=0.5),
+]
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifecycle manager for startup/shutdown events."""
     logger.info("Starting STAR Library API...")
     
     # Initialize database in non-testing environments
-    if not __import__('os').getenv("TESTING_ENV"):
+    if not os.getenv("TESTING_ENV"):
         try:
             create_tables()
             seed_database()
@@ -35,9 +108,26 @@ async def lifespan(app: FastAPI):
             logger.error(f"Database initialization failed: {e}")
             raise
     
+    precompute = os.getenv("PRECOMPUTE_ENABLED", "1") == "1"
+    if precompute:
+        await precomputed.start()
+    
     yield  # Application runs here
     
     logger.info("Shutting down STAR Library API...")
+    if precompute:
+        await precomputed.stop()
+
+# On-demand profiling of requests flagged with X-Profile: 1 or ?profile=1.
+# Allowlisted clients are always profiled; others at PROFILE_SAMPLE_RATE.
+# The allowlist is opt-in and matches the socket peer, i.e. the proxy when behind one.
+profiler = RequestProfiler(
+    directory=os.getenv("PROFILE_DIR", "./profiles"),
+    retention=int(os.getenv("PROFILE_RETENTION", "50")),
+    allowlist=[h.strip() for h in os.getenv("PROFILE_ALLOWLIST", "").split(",") if h.strip()],
+    sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    interval=float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.002")),
+)
 
 # FastAPI Application Instance
 app = FastAPI(
@@ -47,6 +137,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Load shedding (registered first so CORS headers still wrap 503 responses)
+app.add_middleware(AdmissionControlMiddleware, route_classes=ADMISSION_ROUTE_CLASSES)
+
 # CORS Configuration for Frontend Integration
 app.add_middleware(
     CORSMiddleware,
@@ -56,7 +149,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def get_current_user(db: Session = Depends(get_db)) -> models.Reader:
+# Request profiling (registered inside query accounting to share its SQL tracking)
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+# Per-request database query accounting; X-DB-Queries / X-DB-Time-Ms headers are opt-in
+app.add_middleware(QueryCountMiddleware, expose_headers=os.getenv("DB_QUERY_HEADERS", "0") == "1")
+
+def get_current_user(db: Session = Depends(get_db)) -> ReaderRow:
     """Retrieve current user for authentication (simulated with hardcoded ID)."""
     reader = crud.get_reader_with_stats(db, HARDCODED_READER_ID)
     if not reader:
@@ -91,6 +190,11 @@ async def health_check(db: Session = Depends(get_db)):
         "database": db_status
     }
 
+@app.get("/metrics", tags=["Root"], response_model=dict)
+async def get_metrics():
+    """Process counters: admission decisions, queue depths, shared query and precompute stats."""
+    return instrumentation.snapshot()
+
 @app.get(
     "/dashboardData",
     response_model=schemas.DashboardData,
@@ -98,17 +202,20 @@ async def health_check(db: Session = Depends(get_db)):
     summary="Get reader dashboard data",
     description="Retrieve personalized dashboard with reading statistics and recommendations."
 )
-async def get_dashboard(
-    current_reader: models.Reader = Depends(get_current_user),
+def get_dashboard(
+    current_reader: ReaderRow = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Fetch comprehensive dashboard data for authenticated reader."""
+    """
+    Fetch comprehensive dashboard data for authenticated reader.
+    Runs in the threadpool so concurrent requests can share in-flight global queries.
+    """
     try:
         return schemas.DashboardData(
             reader_id=current_reader.id,
             reader_name=current_reader.name,
-            most_popular_books=crud.get_most_popular_books(db),
-            most_popular_author=crud.get_most_popular_author(db),
+            most_popular_books=_precomputed(db, "most_popular_books", _popular_books),
+            most_popular_author=_precomputed(db, "most_popular_author", _popular_author),
             user_books_read=current_reader.books_read,
             user_top_authors=crud.get_reader_top_authors(db, current_reader.id)
         )
@@ -120,7 +227,7 @@ async def get_dashboard(
         )
 
 @app.get("/books/", response_model=List[schemas.Book], tags=["Books"])
-async def get_books(
+def get_books(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
@@ -140,11 +247,116 @@ async def get_books(
     
     return crud.get_books(db, skip=skip, limit=limit)
 
+@app.get("/books/trending", response_model=List[schemas.Book], tags=["Books"])
+def get_trending_books(db: Session = Depends(get_db)):
+    """Books with the most reads in the last week (readers_count counts recent reads)."""
+    return _precomputed(db, "trending_books", _trending_books)
+
+@app.get("/genres/", response_model=List[schemas.GenreCount], tags=["Books"])
+def get_genres(db: Session = Depends(get_db)):
+    """Book and read counts per genre."""
+    return _precomputed(db, "genre_counts", _genre_counts)
+
 @app.get("/authors/", response_model=List[schemas.Author], tags=["Authors"])
-async def get_authors(db: Session = Depends(get_db)):
+def get_authors(db: Session = Depends(get_db)):
     """Retrieve all authors with book counts and reader statistics."""
     return crud.get_authors(db)
 
+@app.get("/readers/{reader_id}/stats", response_model=schemas.ReaderStats, tags=["Readers"])
+def get_reader_stats(reader_id: int, db: Session = Depends(get_db)):
+    """Reading totals, genre breakdown, reads per month and average rating for a reader."""
+    stats = crud.get_reader_stats(db, reader_id)
+    if stats is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reader not found")
+    return stats
+
+@app.post(
+    "/readers/{reader_id}/reads",
+    response_model=schemas.ReaderStats,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Readers"]
+)
+def create_reader_read(reader_id: int, read: schemas.ReadCreate, db: Session = Depends(get_db)):
+    """Record a finished book and return the reader's refreshed statistics."""
+    try:
+        recorded = crud.record_read(db, reader_id, read.book_id, read.read_at)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Reader has already read this book"
+        )
+    if not recorded:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reader or book not found")
+    return crud.get_reader_stats(db, reader_id)
+
+# Analytics Endpoints (served from the columnar snapshot, never from SQLite)
+def get_analytics_snapshot() -> analytics.ReadingSnapshot:
+    """Load the current analytics snapshot or report that none has been built."""
+    snapshot = analytics.load_snapshot(analytics.SNAPSHOT_DIR)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analytics snapshot not built. Run: python -m app.analytics"
+        )
+    return snapshot
+
+@app.get("/analytics/genres-by-month", response_model=List[schemas.GenreMonthReads], tags=["Analytics"])
+async def get_genre_month_reads(snapshot: analytics.ReadingSnapshot = Depends(get_analytics_snapshot)):
+    """Reads per genre per calendar month."""
+    return snapshot.reads_per_genre_per_month()
+
+@app.get("/analytics/reading-time", response_model=schemas.ReadingTimeTotals, tags=["Analytics"])
+async def get_reading_time_totals(snapshot: analytics.ReadingSnapshot = Depends(get_analytics_snapshot)):
+    """Total estimated reading time, overall and per genre."""
+    return snapshot.reading_time_totals()
+
+@app.get("/analytics/pages-per-reader", response_model=List[schemas.ReaderPages], tags=["Analytics"])
+async def get_pages_per_reader(
+    limit: int = 100,
+    snapshot: analytics.ReadingSnapshot = Depends(get_analytics_snapshot)
+):
+    """Readers ranked by total pages read."""
+    return snapshot.pages_per_reader(limit=max(1, min(limit, 1000)))
+
+@app.get("/analytics/author-share", response_model=List[schemas.AuthorShare], tags=["Analytics"])
+async def get_author_market_share(
+    limit: int = 100,
+    snapshot: analytics.ReadingSnapshot = Depends(get_analytics_snapshot)
+):
+    """Authors ranked by share of all reads."""
+    return snapshot.author_market_share(limit=max(1, min(limit, 1000)))
+
+# Profile Endpoints (restricted to allowlisted clients)
+def require_profile_access(request: Request) -> None:
+    """Reject clients outside the profiling allowlist."""
+    if not profiler.is_allowed(request.client.host if request.client else None):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Profiling not allowed for this client")
+
+@app.get("/profiles/", response_model=List[schemas.ProfileSummary], tags=["Profiling"],
+         dependencies=[Depends(require_profile_access)])
+def list_profiles():
+    """Stored request profiles, newest first."""
+    summaries = (profiler.load_summary(profile_id) for profile_id in profiler.list_ids())
+    return [summary for summary in summaries if summary]
+
+@app.get("/profiles/{profile_id}", response_model=schemas.ProfileDetail, tags=["Profiling"],
+         dependencies=[Depends(require_profile_access)])
+def get_profile(profile_id: str):
+    """Profile summary with the request's SQL statements and hottest frames."""
+    summary = profiler.load_summary(profile_id)
+    if summary is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return summary
+
+@app.get("/profiles/{profile_id}/speedscope", tags=["Profiling"], dependencies=[Depends(require_profile_access)])
+def get_profile_speedscope(profile_id: str):
+    """Raw sampled profile in speedscope format (open at https://www.speedscope.app)."""
+    path = profiler.speedscope_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=f"{profile_id}.speedscope.json")
+
 # Exception Handlers
 @app.exception_handler(SQLAlchemyError)
 async def handle_database_error(request, exc):
@@ -170,4 +382,7 @@ app.openapi_tags = [
     {"name": "Dashboard", "description": "Personalized reader dashboard endpoints"},
     {"name": "Books", "description": "Book management and retrieval operations"},
     {"name": "Authors", "description": "Author information and statistics"},
+    {"name": "Readers", "description": "Reader statistics and reading history updates"},
+    {"name": "Analytics", "description": "Aggregate reading analytics from the columnar snapshot"},
+    {"name": "Profiling", "description": "On-demand request profiles with correlated SQL timings"},
 ]
\ No newline at end of file
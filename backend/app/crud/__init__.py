@@ -1,20 +1,37 @@
 """
 Data Access Layer (CRUD Operations)
 Contains all database operations using SQLAlchemy ORM patterns.
+Read-only listing paths return lightweight read models (see app.readmodels).
 """
 
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc
-from typing import List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, literal, literal_column, select, true, union_all
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import threading
 from app.models import Book, Author, Reader, book_readers
+from app.readmodels import AUTHOR_COLUMNS, BOOK_COLUMNS, AuthorRow, BookRow, ReaderRow, RowBuilder
+from app import schemas, sketches
 
 # Application Constants
 DEFAULT_POPULAR_BOOKS_LIMIT = 10
 DEFAULT_TOP_AUTHORS_LIMIT = 3
+DEFAULT_DIGEST_CHUNK_SIZE = 5000
+DEFAULT_TRENDING_DAYS = 7
+READER_STATS_CACHE_SIZE = 10000
 
-def get_books(db: Session, skip: int = 0, limit: int = 100) -> List[Book]:
+# Per-reader statistics cache (LRU), invalidated by record_read. Invalidation
+# also flags computations in flight for the reader, whose results may predate
+# the write and are then not cached. Only in-flight computations are tracked.
+_reader_stats_cache: "OrderedDict[int, schemas.ReaderStats]" = OrderedDict()
+_reader_stats_in_flight: Dict[int, List[List[bool]]] = {}  # Reader ID -> stale flag per computation
+_reader_stats_lock = threading.Lock()
+
+def get_books(db: Session, skip: int = 0, limit: int = 100) -> List[BookRow]:
     """
     Retrieve paginated books with dynamically calculated reader counts.
+    Reader counts are correlated index lookups for the page only, not a full aggregate.
     
     Args:
         db: Database session
@@ -22,70 +39,205 @@ def get_books(db: Session, skip: int = 0, limit: int = 100) -> List[Book]:
         limit: Maximum number of records to return
         
     Returns:
-        List of Book objects with reader_count attached
+        List of BookRow read models with readers_count populated
     """
-    books_with_counts = (
-        db.query(Book, func.count(book_readers.c.reader_id).label('readers_count'))
-        .options(joinedload(Book.author))
-        .outerjoin(book_readers)
-        .group_by(Book.id)
+    readers_count = (
+        select(func.count())
+        .where(book_readers.c.book_id == Book.id)
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        select(*BOOK_COLUMNS, *AUTHOR_COLUMNS, readers_count)
+        .outerjoin(Author, Author.id == Book.author_id)
+        .order_by(Book.id)
         .offset(skip)
         .limit(limit)
-        .all()
     )
     
-    # Attach computed reader counts to book objects
-    return [__attach_reader_count(book, count) for book, count in books_with_counts]
+    builder = RowBuilder()
+    return [builder.book(row, row[-1]) for row in rows]
 
-def get_most_popular_books(db: Session, limit: int = DEFAULT_POPULAR_BOOKS_LIMIT) -> List[Book]:
+def get_most_popular_books(
+    db: Session,
+    limit: int = DEFAULT_POPULAR_BOOKS_LIMIT,
+    approximate: Optional[bool] = None,
+) -> List[BookRow]:
     """
     Retrieve books ordered by reader count (most popular first).
     
     Args:
         db: Database session
         limit: Maximum number of popular books to return
+        approximate: Rank by HyperLogLog estimates (default: APPROXIMATE_COUNTS);
+            falls back to exact counts when no sketches have been built
+        
+    Returns:
+        List of BookRow read models sorted by popularity
+    """
+    if __use_sketches(db, approximate):
+        return __books_ranked_by_sketches(db, limit)
+    return __books_ranked_by_reads(db, true(), limit)
+
+def get_trending_books(db: Session, days: int = DEFAULT_TRENDING_DAYS, limit: int = DEFAULT_POPULAR_BOOKS_LIMIT) -> List[BookRow]:
+    """
+    Retrieve books with the most reads within a recent time window.
+    
+    Args:
+        db: Database session
+        days: Length of the window ending now
+        limit: Maximum number of trending books to return
         
     Returns:
-        List of Book objects sorted by popularity
-    """
-    books_with_counts = (
-        db.query(Book, func.count(book_readers.c.reader_id).label('readers_count'))
-        .options(joinedload(Book.author))
-        .outerjoin(book_readers)
-        .group_by(Book.id)
-        .order_by(func.count(book_readers.c.reader_id).desc())
+        List of BookRow read models whose readers_count counts reads in the window
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    return __books_ranked_by_reads(db, book_readers.c.read_at >= since, limit)
+
+def get_genre_counts(db: Session) -> List[dict]:
+    """
+    Count books and reads per genre.
+    
+    Returns:
+        Dictionaries with genre, books_count and reads_count, most read first
+    """
+    reads_per_book = (
+        select(book_readers.c.book_id, func.count().label('reads'))
+        .group_by(book_readers.c.book_id)
+        .subquery()
+    )
+    reads_count = func.coalesce(func.sum(reads_per_book.c.reads), 0)
+    rows = db.execute(
+        select(Book.genre, func.count(Book.id), reads_count)
+        .outerjoin(reads_per_book, reads_per_book.c.book_id == Book.id)
+        .where(Book.genre.is_not(None))
+        .group_by(Book.genre)
+        .order_by(reads_count.desc(), Book.genre)
+    )
+    return [{"genre": genre, "books_count": books, "reads_count": reads} for genre, books, reads in rows]
+
+def get_data_version(db: Session) -> Tuple:
+    """
+    Cheap fingerprint of library contents for detecting new data.
+    Uses index-backed MAX lookups, so inserts are detected but in-place updates
+    and deletions are not.
+    
+    Returns:
+        Tuple that changes whenever books, authors, readers or reads are added
+    """
+    return tuple(db.execute(
+        select(
+            # SQLite rowid grows with each insert into book_readers
+            select(func.max(literal_column('rowid'))).select_from(book_readers).scalar_subquery(),
+            select(func.max(Book.id)).scalar_subquery(),
+            select(func.max(Author.id)).scalar_subquery(),
+            select(func.max(Reader.id)).scalar_subquery(),
+        )
+    ).one())
+
+def __use_sketches(db: Session, approximate: Optional[bool]) -> bool:
+    """Whether approximate counting is requested and sketches are available."""
+    if approximate is None:
+        approximate = sketches.APPROXIMATE_COUNTS
+    return approximate and sketches.has_sketches(db)
+
+def __books_ranked_by_sketches(db: Session, limit: int) -> List[BookRow]:
+    """Rank books by estimated distinct readers from their all-time sketches."""
+    ranking = sketches.rank_by_distinct_readers(db, sketches.BOOK_SCOPE, limit)
+    rows = {
+        row[0]: row for row in db.execute(
+            select(*BOOK_COLUMNS, *AUTHOR_COLUMNS)
+            .outerjoin(Author, Author.id == Book.author_id)
+            .where(Book.id.in_([book_id for book_id, _ in ranking]))
+        )
+    }
+    builder = RowBuilder()
+    return [builder.book(rows[book_id], estimate) for book_id, estimate in ranking if book_id in rows]
+
+def __books_ranked_by_reads(db: Session, read_filter, limit: int) -> List[BookRow]:
+    """Rank books by reads matching a filter, including unread books as zero."""
+    reader_counts = (
+        select(book_readers.c.book_id, func.count().label('readers_count'))
+        .where(read_filter)
+        .group_by(book_readers.c.book_id)
+        .subquery()
+    )
+    readers_count = func.coalesce(reader_counts.c.readers_count, 0)
+    rows = db.execute(
+        select(*BOOK_COLUMNS, *AUTHOR_COLUMNS, readers_count)
+        .outerjoin(Author, Author.id == Book.author_id)
+        .outerjoin(reader_counts, reader_counts.c.book_id == Book.id)
+        .order_by(readers_count.desc(), Book.id)
         .limit(limit)
-        .all()
     )
     
-    return [__attach_reader_count(book, count) for book, count in books_with_counts]
+    builder = RowBuilder()
+    return [builder.book(row, row[-1]) for row in rows]
 
-def get_authors(db: Session) -> List[Author]:
+def get_authors(db: Session, approximate: Optional[bool] = None) -> List[AuthorRow]:
     """
     Retrieve all authors with computed book counts and reader statistics.
+    Statistics are aggregated in a single grouped query to avoid per-book reader loads.
+    
+    Args:
+        approximate: Use HyperLogLog distinct-reader estimates for total_readers
+            (default: APPROXIMATE_COUNTS); exact mode counts reading events
     
     Returns:
-        List of Author objects with books_count and total_readers attached
+        AuthorRow read models with books_count and total_readers filled in
     """
-    authors = db.query(Author).options(joinedload(Author.books)).all()
-    
-    for author in authors:
-        author.books_count = len(author.books)
-        author.total_readers = sum(len(book.readers) for book in author.books)
+    estimates = None
+    if __use_sketches(db, approximate):
+        estimates = sketches.estimate_distinct_readers(db, sketches.AUTHOR_SCOPE)
+        author_stats = (
+            select(Book.author_id, func.count(Book.id).label('books_count'), literal(0).label('total_readers'))
+            .group_by(Book.author_id)
+            .subquery()
+        )
+    else:
+        author_stats = (
+            select(
+                Book.author_id,
+                func.count(func.distinct(Book.id)).label('books_count'),
+                func.count(book_readers.c.reader_id).label('total_readers'),
+            )
+            .outerjoin(book_readers, book_readers.c.book_id == Book.id)
+            .group_by(Book.author_id)
+            .subquery()
+        )
+    rows = db.execute(
+        select(
+            *AUTHOR_COLUMNS,
+            func.coalesce(author_stats.c.books_count, 0),
+            func.coalesce(author_stats.c.total_readers, 0),
+        )
+        .outerjoin(author_stats, author_stats.c.author_id == Author.id)
+        .order_by(Author.id)
+    )
     
-    return authors
+    stats_start = len(AUTHOR_COLUMNS)
+    return [
+        AuthorRow(
+            *row[:stats_start],
+            books_count=row[stats_start],
+            total_readers=estimates.get(row[0], 0) if estimates is not None else row[stats_start + 1],
+        )
+        for row in rows
+    ]
 
-def get_most_popular_author(db: Session) -> Optional[Author]:
+def get_most_popular_author(db: Session, approximate: Optional[bool] = None) -> Optional[AuthorRow]:
     """
     Identify author with the highest total readership across all their books.
     
+    Args:
+        approximate: Rank by HyperLogLog distinct-reader estimates (default: APPROXIMATE_COUNTS)
+    
     Returns:
-        Author object with highest reader count, or None if no authors exist
+        AuthorRow with the highest reader count, or None if no authors exist
     """
-    authors = get_authors(db)
+    authors = get_authors(db, approximate=approximate)
     return max(authors, key=lambda author: author.total_readers) if authors else None
 
-def get_reader(db: Session, reader_id: int) -> Optional[Reader]:
+def get_reader(db: Session, reader_id: int) -> Optional[ReaderRow]:
     """
     Retrieve reader by ID with their reading history and book authors.
     
@@ -93,16 +245,28 @@ def get_reader(db: Session, reader_id: int) -> Optional[Reader]:
         reader_id: Unique identifier for the reader
         
     Returns:
-        Reader object with books_read and author relationships loaded
+        ReaderRow read model with books_read populated, or None if not found
     """
-    return (
-        db.query(Reader)
-        .options(joinedload(Reader.books_read).joinedload(Book.author))
-        .filter(Reader.id == reader_id)
-        .first()
+    reader = db.execute(
+        select(Reader.id, Reader.name, Reader.email, Reader.favorite_genre, Reader.join_date)
+        .where(Reader.id == reader_id)
+    ).first()
+    if not reader:
+        return None
+    
+    builder = RowBuilder()
+    books_read = tuple(
+        builder.book(row) for row in db.execute(
+            select(*BOOK_COLUMNS, *AUTHOR_COLUMNS)
+            .join(book_readers, book_readers.c.book_id == Book.id)
+            .outerjoin(Author, Author.id == Book.author_id)
+            .where(book_readers.c.reader_id == reader_id)
+            .order_by(Book.id)
+        )
     )
+    return ReaderRow(*reader, books_read=books_read)
 
-def get_reader_top_authors(db: Session, reader_id: int, limit: int = DEFAULT_TOP_AUTHORS_LIMIT) -> List[Author]:
+def get_reader_top_authors(db: Session, reader_id: int, limit: int = DEFAULT_TOP_AUTHORS_LIMIT) -> List[AuthorRow]:
     """
     Calculate top authors for a reader based on books read count.
     
@@ -111,37 +275,268 @@ def get_reader_top_authors(db: Session, reader_id: int, limit: int = DEFAULT_TOP
         limit: Maximum number of top authors to return
         
     Returns:
-        List of Author objects sorted by books read count
+        AuthorRow read models sorted by books read count
+    """
+    books_read = func.count(book_readers.c.book_id)
+    rows = db.execute(
+        select(*AUTHOR_COLUMNS)
+        .join(Book, Book.author_id == Author.id)
+        .join(book_readers, book_readers.c.book_id == Book.id)
+        .where(book_readers.c.reader_id == reader_id)
+        .group_by(Author.id)
+        .order_by(books_read.desc(), Author.id)
+        .limit(limit)
+    )
+    return [AuthorRow(*row) for row in rows]
+
+def get_reader_with_stats(db: Session, reader_id: int) -> Optional[ReaderRow]:
+    """
+    Retrieve reader with additional computed statistics.
+    
+    Returns:
+        ReaderRow whose books_read_count reflects the loaded history
+    """
+    return get_reader(db, reader_id)
+
+def get_reader_stats(db: Session, reader_id: int) -> Optional[schemas.ReaderStats]:
+    """
+    Compute reading statistics for a reader with SQL aggregates, cached per reader.
+    Uses two queries (totals, then genre and month breakdowns) and never loads book rows.
+    Writes made outside record_read are not seen until invalidate_reader_stats is called.
+    
+    Args:
+        reader_id: Reader to summarize
+        
+    Returns:
+        ReaderStats, or None if the reader does not exist
     """
-    reader = get_reader(db, reader_id)
-    if not reader or not reader.books_read:
-        return []
+    with _reader_stats_lock:
+        cached = _reader_stats_cache.get(reader_id)
+        if cached is not None:
+            _reader_stats_cache.move_to_end(reader_id)
+            return cached
+        stale = [False]
+        _reader_stats_in_flight.setdefault(reader_id, []).append(stale)
     
-    # Count books per author
-    author_counts = {}
-    for book in reader.books_read:
-        if book.author:
-            author_id = book.author.id
-            author_counts.setdefault(author_id, {'author': book.author, 'count': 0})
-            author_counts[author_id]['count'] += 1
+    stats = None
+    try:
+        stats = __compute_reader_stats(db, reader_id)
+    finally:
+        with _reader_stats_lock:
+            computations = _reader_stats_in_flight[reader_id]
+            computations.remove(stale)
+            if not computations:
+                del _reader_stats_in_flight[reader_id]
+            if stats is not None and not stale[0]:
+                _reader_stats_cache[reader_id] = stats
+                if len(_reader_stats_cache) > READER_STATS_CACHE_SIZE:
+                    _reader_stats_cache.popitem(last=False)
+    return stats
+
+def __compute_reader_stats(db: Session, reader_id: int) -> Optional[schemas.ReaderStats]:
+    """Run the two aggregate queries behind get_reader_stats."""
+    totals = db.execute(
+        select(
+            func.count(Book.id),
+            func.coalesce(func.sum(Book.pages), 0),
+            func.coalesce(func.sum(Book.reading_time), 0),
+            func.avg(Book.rating),
+        )
+        .select_from(Reader)
+        .outerjoin(book_readers, book_readers.c.reader_id == Reader.id)
+        .outerjoin(Book, Book.id == book_readers.c.book_id)
+        .where(Reader.id == reader_id)
+        .group_by(Reader.id)
+    ).first()
+    if totals is None:
+        return None
+    
+    reads = (
+        select(Book.genre, book_readers.c.read_at)
+        .join(Book, Book.id == book_readers.c.book_id)
+        .where(book_readers.c.reader_id == reader_id)
+        .subquery()
+    )
+    month = func.strftime('%Y-%m', reads.c.read_at)
+    breakdown = db.execute(union_all(
+        select(literal('genre'), reads.c.genre, func.count()).where(reads.c.genre.is_not(None)).group_by(reads.c.genre),
+        select(literal('month'), month, func.count()).where(reads.c.read_at.is_not(None)).group_by(month),
+    ))
+    genres, reads_per_month = {}, {}
+    for kind, key, count in breakdown:
+        (genres if kind == 'genre' else reads_per_month)[key] = count
     
-    # Sort by count and return top authors
-    sorted_authors = sorted(author_counts.values(), key=lambda x: x['count'], reverse=True)
-    return [item['author'] for item in sorted_authors[:limit]]
+    books_read_count, total_pages, total_reading_time, average_rating = totals
+    return schemas.ReaderStats(
+        reader_id=reader_id,
+        books_read_count=books_read_count,
+        total_pages=total_pages,
+        total_reading_time=total_reading_time,
+        average_rating=round(average_rating, 2) if average_rating is not None else None,
+        genres=genres,
+        reads_per_month=dict(sorted(reads_per_month.items())),
+    )
+
+def invalidate_reader_stats(reader_id: Optional[int] = None) -> None:
+    """Drop cached statistics for one reader, or for everyone when reader_id is None."""
+    with _reader_stats_lock:
+        if reader_id is None:
+            _reader_stats_cache.clear()
+            in_flight = [stale for computations in _reader_stats_in_flight.values() for stale in computations]
+        else:
+            _reader_stats_cache.pop(reader_id, None)
+            in_flight = _reader_stats_in_flight.get(reader_id, ())
+        for stale in in_flight:
+            stale[0] = True
 
-def get_reader_with_stats(db: Session, reader_id: int) -> Optional[Reader]:
+def record_read(db: Session, reader_id: int, book_id: int, read_at: Optional[datetime] = None) -> bool:
     """
-    Retrieve reader with additional computed statistics.
+    Record that a reader finished a book and invalidate their cached statistics.
+    Distinct-reader sketches are updated too whenever they have been built.
     
     Returns:
-        Reader object with books_read_count attribute added
+        False if the reader or book does not exist, True once recorded
+        
+    Raises:
+        IntegrityError: If the reader has already read the book
     """
-    reader = get_reader(db, reader_id)
-    if reader:
-        reader.books_read_count = len(reader.books_read)
-    return reader
+    book = db.get(Book, book_id)
+    if db.get(Reader, reader_id) is None or book is None:
+        return False
+    read_at = read_at or datetime.utcnow()
+    db.execute(insert(book_readers).values(book_id=book_id, reader_id=reader_id, read_at=read_at))
+    # Keep built sketches current even while approximate counting is switched off
+    if sketches.APPROXIMATE_COUNTS or sketches.has_sketches(db):
+        sketches.add_read(db, book_id, book.author_id, reader_id, read_at)
+    db.commit()
+    invalidate_reader_stats(reader_id)
+    return True
 
-def __attach_reader_count(book: Book, readers_count: int) -> Book:
-    """Helper function to attach reader count to book object."""
-    book.readers_count = readers_count
-    return book
\ No newline at end of file
+def get_dashboard_globals(db: Session) -> schemas.DashboardGlobals:
+    """
+    Compute the community-wide dashboard sections once for a batch of readers.
+    
+    Returns:
+        Serialized most popular books and most popular author
+    """
+    return schemas.DashboardGlobals(
+        most_popular_books=get_most_popular_books(db),
+        most_popular_author=get_most_popular_author(db),
+    )
+
+def iter_reader_digests(
+    db: Session,
+    reader_ids: Optional[Iterable[int]] = None,
+    id_range: Optional[Tuple[int, int]] = None,
+    chunk_size: int = DEFAULT_DIGEST_CHUNK_SIZE,
+    top_authors_limit: int = DEFAULT_TOP_AUTHORS_LIMIT,
+) -> Iterator[schemas.ReaderDigest]:
+    """
+    Stream reading summaries and top authors for many readers.
+    
+    Readers are processed in chunks; each chunk costs three set-based queries
+    (readers, history aggregates, windowed top authors) regardless of size.
+    Unknown reader IDs are skipped.
+    
+    Args:
+        db: Database session
+        reader_ids: Explicit reader IDs to process
+        id_range: Inclusive (first, last) reader ID range, used when reader_ids is None
+        chunk_size: Readers per query round-trip
+        top_authors_limit: Maximum top authors per reader
+        
+    Yields:
+        ReaderDigest for each existing reader, in ascending ID order
+    """
+    for readers in __iter_reader_chunks(db, reader_ids, id_range, chunk_size):
+        first_id, last_id = readers[0].id, readers[-1].id
+        if reader_ids is None:
+            # Keyset chunks are exactly the readers within [first_id, last_id]
+            in_chunk = book_readers.c.reader_id.between(first_id, last_id)
+        else:
+            in_chunk = book_readers.c.reader_id.in_([reader.id for reader in readers])
+        
+        history = {
+            row.reader_id: row for row in db.execute(
+                select(
+                    book_readers.c.reader_id,
+                    func.count().label('books_read_count'),
+                    func.coalesce(func.sum(Book.pages), 0).label('total_pages'),
+                    func.coalesce(func.sum(Book.reading_time), 0).label('total_reading_time'),
+                    func.max(book_readers.c.read_at).label('last_read_at'),
+                )
+                .join(Book, Book.id == book_readers.c.book_id)
+                .where(in_chunk)
+                .group_by(book_readers.c.reader_id)
+            )
+        }
+        top_authors = __chunk_top_authors(db, in_chunk, top_authors_limit)
+        
+        for reader in readers:
+            summary = history.get(reader.id)
+            yield schemas.ReaderDigest(
+                reader_id=reader.id,
+                reader_name=reader.name,
+                books_read_count=summary.books_read_count if summary else 0,
+                total_pages=summary.total_pages if summary else 0,
+                total_reading_time=summary.total_reading_time if summary else 0,
+                last_read_at=summary.last_read_at if summary else None,
+                top_authors=top_authors.get(reader.id, []),
+            )
+
+def __iter_reader_chunks(db: Session, reader_ids, id_range, chunk_size: int):
+    """Yield lists of (id, name) reader rows, either by explicit IDs or keyset over a range."""
+    reader_columns = select(Reader.id, Reader.name).order_by(Reader.id)
+    
+    if reader_ids is not None:
+        ids = sorted(set(reader_ids))
+        for start in range(0, len(ids), chunk_size):
+            readers = db.execute(reader_columns.where(Reader.id.in_(ids[start:start + chunk_size]))).all()
+            if readers:
+                yield readers
+        return
+    
+    next_id, last_id = id_range if id_range else (None, None)
+    while True:
+        query = reader_columns.limit(chunk_size)
+        if next_id is not None:
+            query = query.where(Reader.id >= next_id)
+        if last_id is not None:
+            query = query.where(Reader.id <= last_id)
+        readers = db.execute(query).all()
+        if not readers:
+            return
+        yield readers
+        next_id = readers[-1].id + 1
+
+def __chunk_top_authors(db: Session, in_chunk, limit: int) -> dict:
+    """Rank authors per reader for one chunk using a window partitioned by reader."""
+    books_read = func.count().label('books_read')
+    per_author = (
+        select(
+            book_readers.c.reader_id,
+            Book.author_id,
+            books_read,
+            func.row_number().over(
+                partition_by=book_readers.c.reader_id,
+                order_by=(func.count().desc(), Book.author_id),
+            ).label('author_rank'),
+        )
+        .join(Book, Book.id == book_readers.c.book_id)
+        .where(in_chunk, Book.author_id.is_not(None))
+        .group_by(book_readers.c.reader_id, Book.author_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(per_author.c.reader_id, Author.id, Author.name, per_author.c.books_read)
+        .join(Author, Author.id == per_author.c.author_id)
+        .where(per_author.c.author_rank <= limit)
+        .order_by(per_author.c.reader_id, per_author.c.author_rank)
+    )
+    
+    top_authors = {}
+    for reader_id, author_id, name, count in rows:
+        top_authors.setdefault(reader_id, []).append(
+            schemas.ReaderTopAuthor(id=author_id, name=name, books_read=count)
+        )
+    return top_authors
@@ -3,25 +3,53 @@ Database Configuration
 SQLAlchemy engine, session management, and connection utilities.
 """
 
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker
 from .models import Base
 
-# Database Configuration
-SQLALCHEMY_DATABASE_URL = "sqlite:///./starlibrary.db"
+# Database Configuration (overridable for load tests and alternate datasets)
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./starlibrary.db")
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))  # Persistent connections
+POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))  # Extra connections under burst
+
+def _pool_options(url: str) -> dict:
+    """Pool sizing arguments, only for URLs served by a QueuePool (not e.g. in-memory SQLite)."""
+    parsed = make_url(url)
+    if issubclass(parsed.get_dialect().get_pool_class(parsed), QueuePool):
+        return {"pool_size": POOL_SIZE, "max_overflow": POOL_MAX_OVERFLOW}
+    return {}
 
 # Database engine with SQLite connection optimization
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Required for SQLite thread safety
+    connect_args={"check_same_thread": False},  # Required for SQLite thread safety
+    **_pool_options(SQLALCHEMY_DATABASE_URL),
 )
 
 # Session factory for creating database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def create_tables():
-    """Initialize database schema by creating all defined tables."""
+    """Initialize database schema by creating all defined tables and their indexes."""
     Base.metadata.create_all(bind=engine)
+    ensure_indexes(engine)
+
+def ensure_indexes(bind=engine):
+    """
+    Create declared indexes that are missing from existing tables (tables that
+    do not exist yet are left to create_all).
+    
+    create_all skips tables that already exist, so indexes added to the models
+    later would otherwise never reach databases created before them.
+    """
+    existing = set(inspect(bind).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name in existing:
+            for index in table.indexes:
+                index.create(bind=bind, checkfirst=True)
 
 def get_db():
     """
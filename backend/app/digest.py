@@ -0,0 +1,72 @@
+"""
+Batch Dashboard Digests
+Command-line export of dashboard data for many readers as JSON Lines.
+
+The first line holds the community-wide sections (computed once); every
+following line is one reader's digest.
+
+Usage:
+    python -m app.digest --start 1 --end 1000000 --output digests.jsonl
+    python -m app.digest --ids 1,2,3
+"""
+
+import argparse
+import sys
+import time
+import logging
+from typing import List, Optional, TextIO
+
+from .database import SessionLocal, ensure_indexes
+from . import crud
+
+logger = logging.getLogger(__name__)
+
+def write_digests(
+    out: TextIO,
+    reader_ids: Optional[List[int]] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    chunk_size: int = crud.DEFAULT_DIGEST_CHUNK_SIZE,
+) -> int:
+    """
+    Stream the global sections followed by per-reader digests to a text stream.
+
+    Returns:
+        Number of reader digests written
+    """
+    db = SessionLocal()
+    try:
+        out.write(crud.get_dashboard_globals(db).model_dump_json() + "\n")
+        id_range = None if reader_ids is not None else (start, end)
+        written = 0
+        for digest in crud.iter_reader_digests(db, reader_ids=reader_ids, id_range=id_range, chunk_size=chunk_size):
+            out.write(digest.model_dump_json() + "\n")
+            written += 1
+        return written
+    finally:
+        db.close()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ids", help="Comma-separated reader IDs")
+    parser.add_argument("--start", type=int, help="First reader ID of the range (inclusive)")
+    parser.add_argument("--end", type=int, help="Last reader ID of the range (inclusive)")
+    parser.add_argument("--chunk-size", type=int, default=crud.DEFAULT_DIGEST_CHUNK_SIZE)
+    parser.add_argument("--output", help="Output file (defaults to stdout)")
+    args = parser.parse_args(argv)
+
+    reader_ids = [int(value) for value in args.ids.split(",")] if args.ids else None
+    out = open(args.output, "w") if args.output else sys.stdout
+    ensure_indexes()  # Per-reader scans need ix_book_readers_reader_id on older databases
+    started_at = time.perf_counter()
+    try:
+        written = write_digests(out, reader_ids, args.start, args.end, args.chunk_size)
+    finally:
+        if args.output:
+            out.close()
+    logger.info(f"Wrote {written} reader digests in {time.perf_counter() - started_at:.1f}s")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,138 @@
+"""
+Request Instrumentation
+Per-request database query accounting exposed through response headers,
+plus process-wide counters and component stats for the metrics endpoint.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Response headers carrying per-request database statistics
+QUERY_COUNT_HEADER = "x-db-queries"
+QUERY_TIME_HEADER = "x-db-time-ms"
+
+class RequestStats:
+    """Mutable accumulator for the database work performed by one request."""
+    __slots__ = ("query_count", "query_time", "statements", "threads")
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_time = 0.0  # Seconds spent inside cursor execution
+        # Only set while a request is profiled, so untraced requests skip the bookkeeping
+        self.statements: Optional[List[Tuple[str, float, float, int]]] = None  # (SQL, start, duration, thread)
+        self.threads: Optional[Set[int]] = None  # Threads that executed SQL for the request
+
+    def trace_statements(self) -> None:
+        """Start recording each statement's text, timing and executing thread."""
+        self.statements = []
+        self.threads = set()
+
+# Active stats for the current request; propagated into threadpool workers
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def current_stats() -> Optional[RequestStats]:
+    """Return the stats of the request being tracked in this context, if any."""
+    return _current_stats.get()
+
+@contextmanager
+def track_queries() -> Iterator[RequestStats]:
+    """
+    Count SQL statements executed within the block.
+
+    Yields:
+        RequestStats updated as statements complete
+    """
+    stats = RequestStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Record statement start time when a request is being tracked."""
+    stats = _current_stats.get()
+    if stats is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+        if stats.threads is not None:
+            stats.threads.add(threading.get_ident())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Attribute statement count and duration to the tracked request."""
+    stats = _current_stats.get()
+    if stats is None or not conn.info.get("query_start_time"):
+        return
+    started = conn.info["query_start_time"].pop()
+    duration = time.perf_counter() - started
+    stats.query_count += 1
+    stats.query_time += duration
+    if stats.statements is not None:
+        stats.statements.append((statement, started, duration, threading.get_ident()))
+
+class QueryCountMiddleware:
+    """
+    ASGI middleware tracking query count and time for each HTTP request.
+    The stats are always collected in-process (the profiler reads them) but
+    only reported as response headers when expose_headers is set.
+    """
+
+    def __init__(self, app, expose_headers: bool = False):
+        self.app = app
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if not self.expose_headers:
+            with track_queries():
+                await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((QUERY_COUNT_HEADER.encode(), str(stats.query_count).encode()))
+                    headers.append((QUERY_TIME_HEADER.encode(), f"{stats.query_time * 1000:.2f}".encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+# Process-wide counters, grouped by component (e.g. admission decisions per route class)
+_counters: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+_counters_lock = threading.Lock()
+_stats_providers: Dict[str, Callable[[], dict]] = {}
+
+def increment(section: str, name: str, amount: float = 1) -> None:
+    """Add to a named counter within a component section."""
+    with _counters_lock:
+        _counters[section][name] += amount
+
+def register_stats_provider(name: str, provider: Callable[[], dict]) -> None:
+    """Expose a component's live stats (gauges, cache hits) in metrics snapshots."""
+    _stats_providers[name] = provider
+
+def snapshot() -> dict:
+    """
+    Collect all counters and provider stats.
+
+    Returns:
+        Mapping of section name to its counters or stats
+    """
+    with _counters_lock:
+        data = {section: dict(values) for section, values in _counters.items()}
+    for name, provider in _stats_providers.items():
+        data.setdefault(name, {}).update(provider())
+    return data
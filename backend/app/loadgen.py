@@ -0,0 +1,262 @@
+"""
+Load Generation Harness
+Serves the API under uvicorn in a child process against a generated dataset
+and replays a weighted request mix at a target rate, reporting throughput,
+latency percentiles, error rate and database query counts per endpoint.
+Query counts come from the X-DB-Queries header, which the harness enables
+on the server it starts; a server given with --url reports them only if it
+runs with DB_QUERY_HEADERS=1.
+
+Usage:
+    python -m app.loadgen --rps 200 --duration 30 --concurrency 64 \\
+        --mix dashboard=1,books=4,authors=1
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from .instrumentation import QUERY_COUNT_HEADER
+
+# Load Profile Configuration
+ENDPOINT_PATHS = {
+    "dashboard": "/dashboardData",
+    "books": "/books/",
+    "authors": "/authors/",
+}
+DEFAULT_MIX = "dashboard=1,books=4,authors=1"
+BOOK_PAGE_LIMITS = (10, 50, 100, 500, 1000)
+DEFAULT_BOOKS = 2000
+REQUEST_TIMEOUT_SECONDS = 30.0
+SERVER_START_TIMEOUT_SECONDS = 30.0
+
+@dataclass
+class EndpointStats:
+    """Latency samples and counters collected for a single endpoint."""
+    latencies: List[float] = field(default_factory=list)  # Seconds, measured from scheduled send time
+    errors: int = 0
+    queries: int = 0
+    queried: int = 0  # Responses that reported a query count
+
+    def percentile(self, pct: float) -> float:
+        """Return the nearest-rank percentile latency in milliseconds."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index] * 1000
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """
+    Parse a traffic mix specification such as ``dashboard=1,books=4``.
+
+    Returns:
+        Mapping of endpoint name to relative weight
+
+    Raises:
+        ValueError: If an endpoint is unknown or a weight is invalid
+    """
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in ENDPOINT_PATHS:
+            raise ValueError(f"Unknown endpoint '{name}', expected one of {sorted(ENDPOINT_PATHS)}")
+        mix[name] = float(weight or 1)
+        if mix[name] < 0:
+            raise ValueError(f"Weight for '{name}' cannot be negative")
+    if not any(mix.values()):
+        raise ValueError("Traffic mix must contain at least one positive weight")
+    return mix
+
+def build_request_path(endpoint: str, rng: random.Random, books_total: Optional[int]) -> str:
+    """
+    Build a request path, varying pagination for the books listing.
+    The offset is only varied when the number of books on the target is known.
+    """
+    path = ENDPOINT_PATHS[endpoint]
+    if endpoint == "books":
+        limit = rng.choice(BOOK_PAGE_LIMITS)
+        if books_total is None:
+            return f"{path}?limit={limit}"
+        skip = rng.randint(0, max(0, books_total - 1))
+        path = f"{path}?skip={skip}&limit={limit}"
+    return path
+
+async def run_load(
+    base_url: str,
+    mix: Dict[str, float],
+    rps: float,
+    duration: float,
+    concurrency: int,
+    books_total: Optional[int],
+    seed: int = 0,
+) -> Tuple[Dict[str, EndpointStats], float]:
+    """
+    Replay an open-loop request schedule against a running server.
+
+    Requests are scheduled at a fixed rate regardless of response times, and
+    latency is measured from the scheduled send time so queueing delay caused
+    by an overloaded server is included in the reported percentiles.
+
+    Returns:
+        Per-endpoint statistics and the elapsed wall-clock time in seconds
+    """
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    results = {name: EndpointStats() for name in names}
+    queue: asyncio.Queue = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+
+    async def worker(client: httpx.AsyncClient):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            scheduled_at, name, path = item
+            stats = results[name]
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    stats.errors += 1
+                if QUERY_COUNT_HEADER in response.headers:
+                    stats.queries += int(response.headers[QUERY_COUNT_HEADER])
+                    stats.queried += 1
+            except httpx.HTTPError:
+                stats.errors += 1
+            stats.latencies.append(loop.time() - scheduled_at)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=REQUEST_TIMEOUT_SECONDS) as client:
+        workers = [asyncio.create_task(worker(client)) for _ in range(concurrency)]
+        started_at = loop.time()
+        for i in range(int(rps * duration)):
+            scheduled_at = started_at + i / rps
+            await asyncio.sleep(max(0.0, scheduled_at - loop.time()))
+            name = rng.choices(names, weights=weights)[0]
+            queue.put_nowait((scheduled_at, name, build_request_path(name, rng, books_total)))
+        for _ in workers:
+            queue.put_nowait(None)
+        await asyncio.gather(*workers)
+
+    return results, loop.time() - started_at
+
+def format_report(results: Dict[str, EndpointStats], elapsed: float) -> str:
+    """Render per-endpoint statistics as a plain-text table."""
+    header = f"{'endpoint':<12}{'requests':>10}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}{'queries/req':>13}"
+    lines = [header, "-" * len(header)]
+    for name, stats in results.items():
+        count = len(stats.latencies)
+        queries = f"{stats.queries / stats.queried:.1f}" if stats.queried else "n/a"
+        lines.append(
+            f"{name:<12}{count:>10}{count / elapsed if elapsed else 0:>9.1f}"
+            f"{stats.percentile(50):>10.1f}{stats.percentile(95):>10.1f}{stats.percentile(99):>10.1f}"
+            f"{(stats.errors / count if count else 0):>9.1%}{queries:>13}"
+        )
+    total = sum(len(stats.latencies) for stats in results.values())
+    lines.append(f"\nTotal: {total} requests in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f} req/s)")
+    return "\n".join(lines)
+
+def start_server(host: str, port: int) -> subprocess.Popen:
+    """
+    Start the API under uvicorn in a child process.
+
+    A separate process keeps server work from competing with the load
+    generator for the GIL, which would otherwise inflate client latencies.
+
+    Returns:
+        Running server process, once it answers requests
+    """
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.api:app", "--host", host, "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=backend_dir,
+        env=os.environ.copy(),
+    )
+    deadline = time.monotonic() + SERVER_START_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited during startup with code {process.returncode}")
+        try:
+            httpx.get(f"http://{host}:{port}/", timeout=1.0)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Server did not start in time")
+
+def prepare_dataset(db_path: str, args) -> None:
+    """Generate the synthetic dataset unless an existing one should be reused."""
+    from .database import SessionLocal, create_tables
+    from .seed import seed_synthetic_data
+
+    reuse = args.reuse_db and os.path.exists(db_path)
+    create_tables()  # Also adds indexes missing from a reused dataset
+    if reuse:
+        return
+    db = SessionLocal()
+    try:
+        seed_synthetic_data(
+            db, authors=args.authors, books=args.books, readers=args.readers,
+            reads_per_reader=args.reads_per_reader, seed=args.seed,
+        )
+    finally:
+        db.close()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Target an already running server instead of starting one")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rps", type=float, default=100.0, help="Target request rate")
+    parser.add_argument("--duration", type=float, default=20.0, help="Test duration in seconds")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent client connections")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted endpoint mix")
+    parser.add_argument("--db", default="loadgen.db", help="SQLite file for the generated dataset")
+    parser.add_argument("--reuse-db", action="store_true", help="Reuse an existing dataset file")
+    parser.add_argument("--authors", type=int, default=100)
+    parser.add_argument("--books", type=int,
+                        help=f"Books to generate (default {DEFAULT_BOOKS}); with --url, the book count of the target")
+    parser.add_argument("--readers", type=int, default=5000)
+    parser.add_argument("--reads-per-reader", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    server = None
+    base_url = args.url
+    books_total = args.books  # Unknown for a running target unless given
+    if not base_url:
+        args.books = books_total = args.books or DEFAULT_BOOKS
+        db_path = os.path.abspath(args.db)
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+        os.environ.setdefault("TESTING_ENV", "1")  # Skip demo seeding; the harness owns the dataset
+        os.environ.setdefault("PRECOMPUTE_ENABLED", "1")  # Measure the production configuration
+        os.environ["DB_QUERY_HEADERS"] = "1"  # The report reads per-request query counts
+        prepare_dataset(db_path, args)
+        server = start_server(args.host, args.port)
+        base_url = f"http://{args.host}:{args.port}"
+
+    try:
+        print(f"Replaying {args.mix} at {args.rps:g} req/s for {args.duration:g}s against {base_url}")
+        results, elapsed = asyncio.run(run_load(
+            base_url, mix, args.rps, args.duration, args.concurrency, books_total, args.seed,
+        ))
+        print(format_report(results, elapsed))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
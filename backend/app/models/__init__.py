@@ -3,7 +3,7 @@ Database Models (SQLAlchemy ORM)
 Defines database schema and relationships between entities.
 """
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime, Index, LargeBinary
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
 
@@ -16,6 +16,7 @@ book_readers = Table(
     Column("book_id", Integer, ForeignKey("books.id"), primary_key=True),
     Column("reader_id", Integer, ForeignKey("readers.id"), primary_key=True),
     Column("read_at", DateTime, default=datetime.utcnow),  # Track reading timestamps
+    Index("ix_book_readers_reader_id", "reader_id", "book_id"),  # Per-reader scans and aggregates
 )
 
 class Author(Base):
@@ -63,4 +64,18 @@ class Reader(Base):
     favorite_genre = Column(String)
 
     # Many-to-many relationship with Books through book_readers
-    books_read = relationship("Book", secondary=book_readers, back_populates="readers")
\ No newline at end of file
+    books_read = relationship("Book", secondary=book_readers, back_populates="readers")
+
+class ReaderSketch(Base):
+    """HyperLogLog sketch of distinct readers for a book or author in one time bucket."""
+    __tablename__ = "reader_sketches"
+
+    scope = Column(String, primary_key=True)  # "book" or "author"
+    entity_id = Column(Integer, primary_key=True)  # Book or author ID
+    bucket = Column(String, primary_key=True)  # YYYY-MM of read_at, or "all"
+    registers = Column(LargeBinary, nullable=False)  # Compressed sketch registers
+    estimated_readers = Column(Integer, nullable=False, default=0)  # Cached sketch estimate
+
+    __table_args__ = (
+        Index("ix_reader_sketches_ranking", "scope", "bucket", "estimated_readers"),
+    )
\ No newline at end of file
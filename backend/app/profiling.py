@@ -0,0 +1,345 @@
+"""
+On-Demand Request Profiling
+Profiles single requests flagged with an ``x-profile`` header or ``?profile=1``
+using a sampling profiler, correlates the samples with the SQL statements the
+request issued, and keeps the results on disk in a bounded retention ring.
+
+Only flagged requests from allowlisted clients are always profiled; flagged
+requests from other clients are profiled at PROFILE_SAMPLE_RATE. The allowlist
+is empty unless PROFILE_ALLOWLIST is set. It matches the socket peer address,
+so behind a reverse proxy every client appears as the proxy's address.
+Unflagged requests pay for a header scan and nothing else.
+
+Each profile is stored as two files in PROFILE_DIR:
+    <id>.json             request summary, SQL statements and hottest frames
+    <id>.speedscope.json  samples per thread, viewable at https://www.speedscope.app
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from . import instrumentation
+from .instrumentation import RequestStats, track_queries
+
+logger = logging.getLogger(__name__)
+
+# Profiling Configuration
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "x-profile-id"
+PROFILE_QUERY_FLAG = "profile"
+PROFILE_PATH_PREFIX = "/profiles"  # Profile retrieval endpoints are never profiled themselves
+MAX_ACTIVE_PROFILES = 2  # Concurrent profiled requests; further flags are ignored
+MAX_STACK_DEPTH = 128
+TOP_FRAMES_LIMIT = 15
+
+_PROFILE_ID_PATTERN = re.compile(r"^[0-9]{16}-[0-9a-f]{6}$")
+_FLAG_VALUES = (b"1", b"true", b"yes")
+
+class StackSampler:
+    """
+    Samples the Python stacks of a set of threads on a fixed interval.
+
+    The set is shared, not copied: it may grow while sampling (e.g. as
+    threadpool workers start executing SQL for the request), so it is read
+    on every tick.
+    """
+
+    def __init__(self, threads: Set[int], interval: float):
+        self.threads = threads
+        self.interval = interval
+        self.frames: List[Tuple[str, str, int]] = []  # (function, file, first line)
+        self.samples: Dict[int, List[Tuple[Tuple[int, ...], float]]] = defaultdict(list)  # Per thread: (stack, time)
+        self.started = 0.0
+        self.stopped = 0.0
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        """Begin sampling in a background thread."""
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        self._thread.join()
+        self.stopped = time.perf_counter()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            current = sys._current_frames()
+            for thread_id in list(self.threads):
+                frame = current.get(thread_id)
+                if frame is not None:
+                    self.samples[thread_id].append((self._stack(frame), now))
+            del current
+
+    def _stack(self, frame) -> Tuple[int, ...]:
+        """Frame indices of a stack, outermost first."""
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            key = (code.co_name, code.co_filename, code.co_firstlineno)
+            index = self._frame_index.get(key)
+            if index is None:
+                index = self._frame_index[key] = len(self.frames)
+                self.frames.append(key)
+            stack.append(index)
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    def to_speedscope(self, name: str, thread_names: Dict[int, str]) -> dict:
+        """
+        Render the samples in speedscope's file format, one sampled profile
+        per thread, with each sample weighted by the time since the previous one.
+        """
+        profiles = []
+        for thread_id, samples in self.samples.items():
+            previous = self.started
+            stacks, weights = [], []
+            for stack, sampled_at in samples:
+                stacks.append(list(stack))
+                weights.append(round((sampled_at - previous) * 1000, 3))
+                previous = sampled_at
+            profiles.append({
+                "type": "sampled",
+                "name": thread_names.get(thread_id, f"thread {thread_id}"),
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": stacks,
+                "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "starlibrary",
+            "shared": {"frames": [{"name": n, "file": f, "line": line} for n, f, line in self.frames]},
+            "profiles": profiles,
+        }
+
+    def top_frames(self, limit: int = TOP_FRAMES_LIMIT) -> List[dict]:
+        """Functions with the most self time (leaf samples) across all threads."""
+        self_ms: Counter = Counter()
+        samples: Counter = Counter()
+        for thread_samples in self.samples.values():
+            previous = self.started
+            for stack, sampled_at in thread_samples:
+                if stack:
+                    self_ms[stack[-1]] += (sampled_at - previous) * 1000
+                    samples[stack[-1]] += 1
+                previous = sampled_at
+        return [
+            {"name": self.frames[i][0], "file": self.frames[i][1], "line": self.frames[i][2],
+             "self_ms": round(ms, 2), "samples": samples[i]}
+            for i, ms in self_ms.most_common(limit)
+        ]
+
+class RequestProfiler:
+    """
+    Decides which requests to profile and stores their profiles.
+
+    Args:
+        directory: Where profile artifacts are written
+        retention: Number of profiles kept; the oldest are deleted beyond it
+        allowlist: Client hosts whose flagged requests are always profiled (none by default)
+        sample_rate: Probability of profiling a flagged request from any other client
+        interval: Seconds between stack samples
+    """
+
+    def __init__(self, directory: str, retention: int = 50, allowlist: Iterable[str] = (),
+                 sample_rate: float = 0.0, interval: float = 0.002):
+        self.directory = directory
+        self.retention = retention
+        self.allowlist = set(allowlist)
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self._active = threading.BoundedSemaphore(MAX_ACTIVE_PROFILES)
+        self._lock = threading.Lock()
+
+    def begin(self) -> bool:
+        """Claim one of the concurrent profiling slots without waiting."""
+        return self._active.acquire(blocking=False)
+
+    def end(self) -> None:
+        """Release a slot claimed by begin()."""
+        self._active.release()
+
+    def is_allowed(self, client_host: Optional[str]) -> bool:
+        """Whether a client may force profiling and read stored profiles."""
+        return client_host in self.allowlist
+
+    def should_profile(self, scope) -> bool:
+        """Whether an incoming HTTP request is flagged and passes the allowlist or sampling gate."""
+        if not _is_flagged(scope) or scope["path"].startswith(PROFILE_PATH_PREFIX):
+            return False
+        client = scope.get("client")
+        if self.is_allowed(client[0] if client else None):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def save(self, profile_id: str, summary: dict, speedscope: dict) -> None:
+        """Write a profile's artifacts and drop the oldest profiles beyond the retention limit."""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(profile_id, ".speedscope.json"), "w") as f:
+                json.dump(speedscope, f)
+            # Summary written last: its presence marks a complete profile
+            with open(self._path(profile_id, ".json"), "w") as f:
+                json.dump(summary, f)
+            for expired in self.list_ids()[self.retention:]:
+                for suffix in (".json", ".speedscope.json"):
+                    try:
+                        os.remove(self._path(expired, suffix))
+                    except FileNotFoundError:
+                        pass
+
+    def list_ids(self) -> List[str]:
+        """Stored profile IDs, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        ids = (name[:-len(".json")] for name in os.listdir(self.directory) if name.endswith(".json"))
+        return sorted((i for i in ids if _PROFILE_ID_PATTERN.match(i)), reverse=True)
+
+    def load_summary(self, profile_id: str) -> Optional[dict]:
+        """Read a stored profile summary, or None if it does not exist."""
+        path = self._path(profile_id, ".json")
+        if not _PROFILE_ID_PATTERN.match(profile_id) or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def speedscope_path(self, profile_id: str) -> Optional[str]:
+        """Path of a stored speedscope file, or None for unknown or malformed IDs."""
+        if not _PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = self._path(profile_id, ".speedscope.json")
+        return path if os.path.exists(path) else None
+
+    def _path(self, profile_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, profile_id + suffix)
+
+def _is_flagged(scope) -> bool:
+    """Whether the request carries the profiling header or query flag."""
+    for name, value in scope.get("headers", ()):
+        if name == PROFILE_HEADER.encode():
+            return value.lower() in _FLAG_VALUES
+    query = scope.get("query_string", b"")
+    if PROFILE_QUERY_FLAG.encode() not in query:
+        return False
+    for pair in query.split(b"&"):
+        name, _, value = pair.partition(b"=")
+        if name == PROFILE_QUERY_FLAG.encode():
+            return value.lower() in _FLAG_VALUES
+    return False
+
+def _new_profile_id() -> str:
+    """Chronologically sortable unique ID: microsecond timestamp plus random suffix."""
+    return f"{time.time_ns() // 1000:016d}-{secrets.token_hex(3)}"
+
+def build_summary(
+    profile_id: str, scope, status: Optional[int], started_at: datetime,
+    sampler: StackSampler, stats: RequestStats,
+) -> dict:
+    """
+    Summarize a profiled request, placing each SQL statement on the same
+    timeline (milliseconds from request start) as the samples.
+    """
+    statements = [
+        {"statement": sql, "start_ms": round((started - sampler.started) * 1000, 3),
+         "duration_ms": round(duration * 1000, 3), "thread": thread_id}
+        for sql, started, duration, thread_id in stats.statements or ()
+    ]
+    return {
+        "id": profile_id,
+        "method": scope["method"],
+        "path": scope["path"],
+        "query_string": scope.get("query_string", b"").decode("latin-1"),
+        "status": status,
+        "started_at": started_at.isoformat(),
+        "duration_ms": round((sampler.stopped - sampler.started) * 1000, 3),
+        "query_count": stats.query_count,
+        "query_time_ms": round(stats.query_time * 1000, 3),
+        "sample_count": sum(len(samples) for samples in sampler.samples.values()),
+        "statements": statements,
+        "top_frames": sampler.top_frames(),
+    }
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling flagged requests.
+
+    Samples the event loop thread plus every thread that executes SQL on the
+    request's behalf (sync handlers run in threadpool workers). A worker is
+    sampled from its first statement onwards. Must run inside
+    QueryCountMiddleware to share its per-request stats.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self.profiler.begin():
+            logger.info(f"Skipping profile of {scope['path']}: {MAX_ACTIVE_PROFILES} already running")
+            await self.app(scope, receive, send)
+            return
+        try:
+            stats = instrumentation.current_stats()
+            if stats is None:
+                with track_queries() as stats:
+                    await self.__profile(scope, receive, send, stats)
+            else:
+                await self.__profile(scope, receive, send, stats)
+        finally:
+            self.profiler.end()
+
+    async def __profile(self, scope, receive, send, stats: RequestStats) -> None:
+        profile_id = _new_profile_id()
+        status = None
+
+        async def send_with_profile_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER.encode(), profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        stats.trace_statements()
+        loop_thread = threading.get_ident()
+        stats.threads.add(loop_thread)
+        sampler = StackSampler(stats.threads, self.profiler.interval)
+        started_at = datetime.now(timezone.utc)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            thread_names[loop_thread] = f"event loop ({thread_names.get(loop_thread, loop_thread)})"
+            summary = build_summary(profile_id, scope, status, started_at, sampler, stats)
+            speedscope = sampler.to_speedscope(f"{scope['method']} {scope['path']}", thread_names)
+            try:
+                await asyncio.to_thread(self.profiler.save, profile_id, summary, speedscope)
+                instrumentation.increment("profiling", "saved")
+            except OSError as e:
+                logger.error(f"Failed to save profile {profile_id}: {e}")
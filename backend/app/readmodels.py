@@ -0,0 +1,84 @@
+"""
+Read Models
+Immutable slotted row objects for read-only paths, built directly from Core
+select() rows without identity-map or change-tracking overhead.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from .models import Author, Book
+
+# Columns selected for each read model, in constructor order
+AUTHOR_COLUMNS = (Author.id, Author.name, Author.bio, Author.nationality)
+BOOK_COLUMNS = (
+    Book.id, Book.title, Book.description, Book.genre, Book.pages,
+    Book.published_year, Book.reading_time, Book.cover_image_url, Book.rating,
+)
+
+@dataclass(frozen=True, slots=True)
+class AuthorRow:
+    """Author fields plus optional computed statistics."""
+    id: int
+    name: str
+    bio: Optional[str] = None
+    nationality: Optional[str] = None
+    books_count: int = 0
+    total_readers: int = 0
+
+@dataclass(frozen=True, slots=True)
+class BookRow:
+    """Book fields with its author and computed reader count."""
+    id: int
+    title: str
+    description: Optional[str]
+    genre: Optional[str]
+    pages: Optional[int]
+    published_year: Optional[int]
+    reading_time: Optional[int]
+    cover_image_url: Optional[str]
+    rating: Optional[float]
+    author: Optional[AuthorRow]
+    readers_count: int = 0
+
+@dataclass(frozen=True, slots=True)
+class ReaderRow:
+    """Reader profile with reading history."""
+    id: int
+    name: str
+    email: Optional[str]
+    favorite_genre: Optional[str]
+    join_date: Optional[datetime]
+    books_read: Tuple[BookRow, ...] = ()
+
+    @property
+    def books_read_count(self) -> int:
+        """Number of books in the reader's history."""
+        return len(self.books_read)
+
+class RowBuilder:
+    """
+    Builds BookRow objects from rows laid out as BOOK_COLUMNS + AUTHOR_COLUMNS
+    (+ optional readers_count), sharing one AuthorRow per author within a result.
+    """
+    __slots__ = ("_authors",)
+
+    def __init__(self):
+        self._authors: Dict[int, AuthorRow] = {}
+
+    def author(self, row: tuple) -> Optional[AuthorRow]:
+        """Return the shared AuthorRow for AUTHOR_COLUMNS values, or None if absent."""
+        author_id = row[0]
+        if author_id is None:
+            return None
+        author = self._authors.get(author_id)
+        if author is None:
+            author = self._authors[author_id] = AuthorRow(*row)
+        return author
+
+    def book(self, row: tuple, readers_count: int = 0) -> BookRow:
+        """Build a BookRow from a row starting with BOOK_COLUMNS then AUTHOR_COLUMNS."""
+        book_end = len(BOOK_COLUMNS)
+        author = self.author(row[book_end:book_end + len(AUTHOR_COLUMNS)])
+        return BookRow(*row[:book_end], author, readers_count)
@@ -0,0 +1,168 @@
+"""
+Background Precomputation Scheduler
+Refreshes global aggregates in memory on an interval or when the data version
+changes, so request handlers only read precomputed results.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RefreshJob:
+    """An aggregate recomputed by the scheduler."""
+    name: str
+    compute: Callable[[Any], Any]  # Called with a database session
+    interval: float  # Seconds before a result is refreshed regardless of data changes
+    min_interval: float = 1.0  # Minimum seconds between refreshes triggered by data changes
+
+@dataclass
+class _JobState:
+    """Latest result and run statistics for a job."""
+    value: Any = None
+    has_value: bool = False
+    data_version: Optional[Hashable] = None
+    runs: int = 0
+    errors: int = 0
+    last_run_at: Optional[float] = None  # Wall-clock time the last refresh finished
+    last_started: float = float("-inf")  # Monotonic time the last refresh started
+    last_duration: float = 0.0
+    last_error: Optional[str] = None
+    requested: asyncio.Event = field(default_factory=asyncio.Event)
+
+class PrecomputeScheduler:
+    """
+    Runs one refresh loop per job inside the application's event loop.
+
+    Job loops start staggered by ``stagger`` seconds so refreshes do not hit
+    the database together. A job refreshes when its interval elapses, when
+    ``version_fn`` reports changed data (at most every ``min_interval``), or
+    when triggered. Triggers arriving while a refresh runs are coalesced into
+    at most one follow-up refresh. Computation runs in a worker thread with a
+    fresh session from ``session_factory``.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        jobs: List[RefreshJob],
+        version_fn: Optional[Callable[[Any], Hashable]] = None,
+        check_interval: float = 2.0,
+        stagger: float = 0.5,
+    ):
+        self.session_factory = session_factory
+        self.jobs = {job.name: job for job in jobs}
+        self.version_fn = version_fn
+        self.check_interval = check_interval
+        self.stagger = stagger
+        self._states: Dict[str, _JobState] = {}
+        self._data_version: Optional[Hashable] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Return the latest precomputed value for a job, or ``default`` if none yet."""
+        state = self._states.get(name)
+        return state.value if state and state.has_value else default
+
+    def has(self, name: str) -> bool:
+        """Whether a job has produced a value."""
+        state = self._states.get(name)
+        return bool(state and state.has_value)
+
+    def trigger(self, name: Optional[str] = None) -> None:
+        """Request an immediate refresh of one job, or all jobs when name is None."""
+        for job_name, state in self._states.items():
+            if name is None or job_name == name:
+                state.requested.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-job run counts, last run time and duration, and last error."""
+        stats: Dict[str, Any] = {"running": bool(self._tasks)}
+        for name, state in self._states.items():
+            stats[f"{name}.runs"] = state.runs
+            stats[f"{name}.errors"] = state.errors
+            stats[f"{name}.last_run_at"] = state.last_run_at
+            stats[f"{name}.last_duration_ms"] = round(state.last_duration * 1000, 2)
+            stats[f"{name}.last_error"] = state.last_error
+        return stats
+
+    async def start(self) -> None:
+        """Start the version watcher and staggered job loops."""
+        self._states = {name: _JobState() for name in self.jobs}
+        if self.version_fn:
+            self._data_version = await asyncio.to_thread(self.__read_version)
+            self._tasks.append(asyncio.create_task(self.__watch_version()))
+        for position, job in enumerate(self.jobs.values()):
+            self._tasks.append(asyncio.create_task(self.__run_job(job, position * self.stagger)))
+
+    async def stop(self) -> None:
+        """Cancel all loops and wait for them to finish."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def __watch_version(self) -> None:
+        """Poll the data version and wake jobs whose results are outdated."""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                self._data_version = await asyncio.to_thread(self.__read_version)
+            except Exception as e:
+                logger.warning(f"Data version check failed: {e}")
+                continue
+            for state in self._states.values():
+                if state.has_value and state.data_version != self._data_version:
+                    state.requested.set()
+
+    async def __run_job(self, job: RefreshJob, delay: float) -> None:
+        """Refresh a job whenever it is due, forever."""
+        state = self._states[job.name]
+        await asyncio.sleep(delay)
+        while True:
+            since_last = time.monotonic() - state.last_started
+            if state.requested.is_set() and since_last < job.min_interval:
+                await asyncio.sleep(job.min_interval - since_last)
+            state.requested.clear()
+            await self.__refresh(job, state)
+            try:
+                await asyncio.wait_for(state.requested.wait(), timeout=job.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def __refresh(self, job: RefreshJob, state: _JobState) -> None:
+        """Recompute one job in a worker thread and record its statistics."""
+        version = self._data_version
+        state.last_started = time.monotonic()
+        try:
+            state.value = await asyncio.to_thread(self.__compute, job)
+            state.has_value = True
+            state.data_version = version
+            state.last_error = None
+        except Exception as e:
+            state.errors += 1
+            state.last_error = str(e)
+            logger.error(f"Precompute job {job.name} failed: {e}")
+        state.runs += 1
+        state.last_duration = time.monotonic() - state.last_started
+        state.last_run_at = time.time()
+
+    def __compute(self, job: RefreshJob) -> Any:
+        """Run a job's computation with its own session."""
+        db = self.session_factory()
+        try:
+            return job.compute(db)
+        finally:
+            db.close()
+
+    def __read_version(self) -> Hashable:
+        """Read the current data version with its own session."""
+        db = self.session_factory()
+        try:
+            return self.version_fn(db)
+        finally:
+            db.close()
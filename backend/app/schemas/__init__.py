@@ -4,7 +4,8 @@ Defines request/response contracts and data validation rules.
 """
 
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
+from datetime import datetime
 
 class AuthorBase(BaseModel):
     """Base author schema with core biographical fields."""
@@ -71,4 +72,105 @@ class DashboardData(BaseModel):
     user_books_read: List[Book]  # Reader's personal reading history
     user_top_authors: List[Author]  # Reader's most-read authors
 
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+class GenreCount(BaseModel):
+    """Books and reads aggregated per genre."""
+    genre: str
+    books_count: int
+    reads_count: int
+
+class ReadCreate(BaseModel):
+    """Schema for recording that a reader finished a book."""
+    book_id: int
+    read_at: Optional[datetime] = None  # Defaults to now
+
+class ReaderStats(BaseModel):
+    """Aggregated reading statistics for one reader."""
+    reader_id: int
+    books_read_count: int = 0
+    total_pages: int = 0
+    total_reading_time: int = 0  # Hours, summed from book estimates
+    average_rating: Optional[float] = None  # Mean rating of books read
+    genres: Dict[str, int] = {}  # Books read per genre
+    reads_per_month: Dict[str, int] = {}  # YYYY-MM -> books finished
+
+class ReaderTopAuthor(BaseModel):
+    """Author ranked within a single reader's history."""
+    id: int
+    name: str
+    books_read: int  # Books by this author the reader has read
+
+class ReaderDigest(BaseModel):
+    """Per-reader summary produced by batch dashboard computation."""
+    reader_id: int
+    reader_name: str
+    books_read_count: int = 0
+    total_pages: int = 0
+    total_reading_time: int = 0
+    last_read_at: Optional[datetime] = None
+    top_authors: List[ReaderTopAuthor] = []
+
+class DashboardGlobals(BaseModel):
+    """Community-wide dashboard sections shared by every reader."""
+    most_popular_books: List[Book]
+    most_popular_author: Optional[Author] = None
+
+    model_config = {"from_attributes": True}
+
+class GenreMonthReads(BaseModel):
+    """Read count for one genre in one calendar month."""
+    genre: str
+    month: str  # YYYY-MM
+    reads: int
+
+class ReadingTimeTotals(BaseModel):
+    """Estimated reading time summed overall and per genre."""
+    total_reading_time: int
+    by_genre: Dict[str, int]
+
+class ReaderPages(BaseModel):
+    """Pages and books read by a single reader."""
+    reader_id: int
+    pages_read: int
+    books_read: int
+
+class AuthorShare(BaseModel):
+    """Author's share of all reading events."""
+    author_id: int
+    author_name: Optional[str] = None
+    reads: int
+    share: float  # Fraction of all reads (0-1)
+
+class ProfileSummary(BaseModel):
+    """Stored profile of a single request."""
+    id: str
+    method: str
+    path: str
+    query_string: str = ""
+    status: Optional[int] = None
+    started_at: datetime
+    duration_ms: float
+    query_count: int
+    query_time_ms: float
+    sample_count: int
+
+class ProfileStatement(BaseModel):
+    """SQL statement issued during a profiled request."""
+    statement: str
+    start_ms: float  # Offset from request start, on the same timeline as the samples
+    duration_ms: float
+    thread: int
+
+class ProfileFrame(BaseModel):
+    """Function ranked by sampled self time."""
+    name: str
+    file: str
+    line: int
+    self_ms: float
+    samples: int
+
+class ProfileDetail(ProfileSummary):
+    """Profile summary with its SQL timeline and hottest frames."""
+    statements: List[ProfileStatement]
+    top_frames: List[ProfileFrame]
@@ -4,12 +4,21 @@ Populates database with initial test data for development and demonstration.
 """
 
 from sqlalchemy import insert
+from datetime import datetime, timedelta
 from .database import SessionLocal
-from .models import Book, Author, Reader, book_readers
+from .models import Book, Author, Reader, ReaderSketch, book_readers
 import logging
+import random
 
 logger = logging.getLogger(__name__)
 
+# Synthetic Dataset Configuration
+SYNTHETIC_GENRES = [
+    "Fantasy", "Epic Fantasy", "Horror", "Post-Apocalyptic", "Mystery",
+    "Science Fiction", "Romance", "Thriller", "Historical", "Biography",
+]
+SYNTHETIC_INSERT_BATCH_SIZE = 10000
+
 def seed_database():
     """
     Populate database with sample authors, books, readers, and reading relationships.
@@ -32,10 +41,78 @@ def seed_database():
     finally:
         db.close()
 
+def seed_synthetic_data(db, authors=100, books=2000, readers=5000, reads_per_reader=20, seed=0):
+    """
+    Populate database with a generated dataset for load and capacity testing.
+    Clears existing data, then bulk-inserts rows with sequential IDs starting at 1.
+    Book popularity follows a Zipf-like skew so popularity rankings are meaningful.
+    
+    Args:
+        db: Database session
+        authors: Number of authors to create
+        books: Number of books to create (assigned to random authors)
+        readers: Number of readers to create
+        reads_per_reader: Average number of books read per reader
+        seed: Random seed for reproducible datasets
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    __clear_existing_data(db)
+    
+    __insert_in_batches(db, Author, (
+        {"id": i, "name": f"Author {i}", "bio": f"Generated author #{i}",
+         "nationality": rng.choice(["British", "American", "Canadian", "Irish"])}
+        for i in range(1, authors + 1)
+    ))
+    __insert_in_batches(db, Book, (
+        {"id": i, "title": f"Book {i}", "genre": rng.choice(SYNTHETIC_GENRES),
+         "pages": rng.randint(80, 1200), "published_year": rng.randint(1900, 2025),
+         "reading_time": rng.randint(2, 40), "rating": rng.randint(1, 5),
+         "author_id": rng.randint(1, authors), "description": f"Generated book #{i}"}
+        for i in range(1, books + 1)
+    ))
+    __insert_in_batches(db, Reader, (
+        {"id": i, "name": f"Reader {i}", "email": f"reader{i}@example.com",
+         "join_date": now - timedelta(days=rng.randint(0, 3650)),
+         "favorite_genre": rng.choice(SYNTHETIC_GENRES)}
+        for i in range(1, readers + 1)
+    ))
+    
+    # Zipf-like weights: book N is read roughly 1/N as often as book 1
+    book_ids = range(1, books + 1)
+    cum_weights = []
+    total = 0.0
+    for rank in book_ids:
+        total += 1.0 / rank
+        cum_weights.append(total)
+    
+    def reading_rows():
+        for reader_id in range(1, readers + 1):
+            count = min(books, rng.randint(0, 2 * reads_per_reader))
+            for book_id in set(rng.choices(book_ids, cum_weights=cum_weights, k=count)):
+                yield {"book_id": book_id, "reader_id": reader_id,
+                       "read_at": now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))}
+    
+    __insert_in_batches(db, book_readers, reading_rows())
+    logger.info(f"Seeded synthetic dataset: {authors} authors, {books} books, {readers} readers")
+
+def __insert_in_batches(db, target, rows):
+    """Bulk insert an iterable of row dictionaries in fixed-size batches."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= SYNTHETIC_INSERT_BATCH_SIZE:
+            db.execute(insert(target), batch)
+            batch = []
+    if batch:
+        db.execute(insert(target), batch)
+    db.commit()
+
 def __clear_existing_data(db):
     """Remove existing data to start with clean database."""
     logger.info("Clearing existing database...")
     # Clear in dependency order to respect foreign key constraints
+    db.execute(ReaderSketch.__table__.delete())  # Sketches describe the data being removed
     db.execute(book_readers.delete())
     db.execute(Book.__table__.delete())
     db.execute(Author.__table__.delete())
@@ -0,0 +1,116 @@
+"""
+Single-Flight Query Coalescing
+Collapses concurrent calls to the same expensive query into one computation,
+with optional short-lived caching and stale-while-revalidate refreshes.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    """An in-progress computation that concurrent callers wait on."""
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls of ``fn(db, **params)`` keyed by function and parameters.
+
+    The first caller for a key runs the computation with its own session; callers
+    arriving while it runs block until it finishes and share its result or error.
+    Results are kept for ``ttl`` seconds. For a further ``stale_ttl`` seconds the
+    previous result is served immediately while one background refresh runs with
+    a session from ``session_factory``. With both set to 0 (the default), nothing
+    is cached and only in-flight calls are shared.
+
+    Shared results are handed to several callers, so functions should return
+    immutable or detached values rather than session-bound ORM instances.
+    """
+
+    def __init__(self, session_factory: Optional[Callable] = None, ttl: float = 0.0, stale_ttl: float = 0.0):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl if session_factory else 0.0
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._results: Dict[Hashable, tuple] = {}  # key -> (computed_at, value)
+        self.stats = {"computed": 0, "coalesced": 0, "cached": 0, "stale": 0, "refreshes": 0}
+
+    def call(self, db, fn: Callable[..., Any], **params) -> Any:
+        """
+        Return ``fn(db, **params)``, sharing in-flight or recent results.
+
+        Raises:
+            Whatever ``fn`` raised, re-raised in every coalesced caller
+        """
+        key = (fn.__module__, fn.__qualname__, tuple(sorted(params.items())))
+        with self._lock:
+            cached = self._results.get(key)
+            if cached:
+                age = time.monotonic() - cached[0]
+                if age < self.ttl:
+                    self.stats["cached"] += 1
+                    return cached[1]
+                if age < self.ttl + self.stale_ttl:
+                    self.stats["stale"] += 1
+                    if key not in self._inflight:
+                        self.__start_refresh(key, fn, params)
+                    return cached[1]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.stats["coalesced"] += 1
+
+        if leader:
+            self.__run(key, flight, fn, db, params)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def invalidate(self) -> None:
+        """Drop all cached results; in-flight computations are unaffected."""
+        with self._lock:
+            self._results.clear()
+
+    def __run(self, key, flight: _Flight, fn, db, params) -> None:
+        """Compute a result, publish it to waiters and store it for reuse."""
+        try:
+            flight.value = fn(db, **params)
+        except BaseException as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                self.stats["computed"] += 1
+                if flight.error is None and (self.ttl or self.stale_ttl):
+                    self._results[key] = (time.monotonic(), flight.value)
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def __start_refresh(self, key, fn, params) -> None:
+        """Recompute a stale entry in a background thread (caller holds the lock)."""
+        flight = self._inflight[key] = _Flight()
+        self.stats["refreshes"] += 1
+
+        def refresh():
+            db = self.session_factory()
+            try:
+                self.__run(key, flight, fn, db, params)
+            finally:
+                db.close()
+            if flight.error is not None:
+                logger.error(f"Background refresh of {key[1]} failed: {flight.error}")
+
+        threading.Thread(target=refresh, name=f"refresh-{key[1]}", daemon=True).start()
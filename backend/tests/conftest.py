@@ -2,100 +2,200 @@
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from contextlib import contextmanager
 from typing import Generator
 from datetime import datetime, timezone
 import sys
 import os
+import time
 
 # -------------------------------
 # Ensure app directory is on path
 # -------------------------------
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("TESTING_ENV", "1")  # Keep app startup from reseeding the real database
+os.environ.setdefault("PRECOMPUTE_ENABLED", "0")  # Tests exercise the on-demand path deterministically
+os.environ.setdefault("DB_QUERY_HEADERS", "1")  # Query budget tests read the per-request headers
 
 from app.database import Base, get_db
 from app.api import app
-from app import models
+from app.seed import seed_synthetic_data
+from app import crud, models
+
+# Size of the dataset used for query-budget tests
+MEDIUM_DATASET = dict(authors=40, books=400, readers=300, reads_per_reader=15, seed=7)
 
 # -------------------------------
-# Create in-memory SQLite DB
+# In-memory SQLite engines
 # -------------------------------
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+def _create_test_engine():
+    """Create a single-connection in-memory engine with working SAVEPOINT support."""
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    # pysqlite defers BEGIN and breaks nested transactions; emit it ourselves
+    @event.listens_for(test_engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(test_engine, "begin")
+    def _emit_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    return test_engine
+
+def _seed_base_data(session: Session):
+    """Insert the small fixed dataset shared by most tests."""
+    author1 = models.Author(id=1, name="J.K. Rowling", bio="Fantasy writer", nationality="British")
+    author2 = models.Author(id=2, name="George Orwell", bio="Dystopian writer", nationality="British")
+    reader1 = models.Reader(id=1, name="Alice", email="alice@example.com",
+                            join_date=datetime.now(timezone.utc), favorite_genre="Fantasy")
+    reader9999 = models.Reader(id=9999, name="Bob", email="bob@example.com",
+                               join_date=datetime.now(timezone.utc), favorite_genre="Dystopian")
+    book1 = models.Book(id=1, title="HP and the Sorcerer's Stone", genre="Fantasy",
+                        pages=320, published_year=1997, rating=4.5, author_id=author1.id,
+                        description="A young wizard's journey begins")
+    book2 = models.Book(id=2, title="1984", genre="Dystopian", pages=328,
+                        published_year=1949, rating=4.7, author_id=author2.id,
+                        description="A dystopian novel")
+
+    session.add_all([author1, author2, reader1, reader9999, book1, book2])
+    session.flush()
+    reader1.books_read.append(book1)
+    session.commit()
+
+@contextmanager
+def _transactional_session(test_engine) -> Generator[Session, None, None]:
+    """Yield a session whose work, including commits, is rolled back afterwards."""
+    connection = test_engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, autoflush=False, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+        crud.invalidate_reader_stats()  # Cached stats may describe rolled-back rows
 
 # -------------------------------
-# Engine and Connection Fixture
+# Engine Fixtures (schema created once per session)
 # -------------------------------
 @pytest.fixture(scope="session")
 def db_engine():
-    """Provides a persistent DB connection for the whole test session."""
-    connection = engine.connect()
-    yield connection
-    connection.close()
+    """Provides an engine with the schema and base data created once."""
+    test_engine = _create_test_engine()
+    Base.metadata.create_all(bind=test_engine)
+    with Session(bind=test_engine) as session:
+        _seed_base_data(session)
+    yield test_engine
+    test_engine.dispose()
+
+@pytest.fixture(scope="session")
+def medium_engine():
+    """Provides an engine seeded once with a medium-sized synthetic dataset."""
+    test_engine = _create_test_engine()
+    Base.metadata.create_all(bind=test_engine)
+    with Session(bind=test_engine) as session:
+        seed_synthetic_data(session, **MEDIUM_DATASET)
+    yield test_engine
+    test_engine.dispose()
 
 # -------------------------------
-# Database Fixture (Create/Seed/Teardown)
+# Database Fixtures (SAVEPOINT isolation per test)
 # -------------------------------
 @pytest.fixture(scope="function")
-def db(db_engine) -> Generator:
-    """Provides a fresh DB session with seeded data per test."""
-    
-    # 1. Bind sessionmaker to persistent engine
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+def db(db_engine) -> Generator[Session, None, None]:
+    """Provides a session over the base data, rolled back after each test."""
+    with _transactional_session(db_engine) as session:
+        yield session
 
-    # 2. Create tables
-    Base.metadata.create_all(bind=db_engine)
+@pytest.fixture(scope="function")
+def medium_db(medium_engine) -> Generator[Session, None, None]:
+    """Provides a session over the medium dataset, rolled back after each test."""
+    with _transactional_session(medium_engine) as session:
+        yield session
 
-    # 3. Create a session
-    db = TestingSessionLocal()
-    try:
-        # 4. Seed initial test data
-        author1 = models.Author(id=1, name="J.K. Rowling", bio="Fantasy writer", nationality="British")
-        author2 = models.Author(id=2, name="George Orwell", bio="Dystopian writer", nationality="British")
-        reader1 = models.Reader(id=1, name="Alice", email="alice@example.com",
-                                join_date=datetime.now(timezone.utc), favorite_genre="Fantasy")
-        reader9999 = models.Reader(id=9999, name="Bob", email="bob@example.com",
-                                   join_date=datetime.now(timezone.utc), favorite_genre="Dystopian")
-        book1 = models.Book(id=1, title="HP and the Sorcerer's Stone", genre="Fantasy",
-                            pages=320, published_year=1997, rating=4.5, author_id=author1.id,
-                            readers_count=1, description="A young wizard's journey begins")
-        book2 = models.Book(id=2, title="1984", genre="Dystopian", pages=328,
-                            published_year=1949, rating=4.7, author_id=author2.id,
-                            readers_count=0, description="A dystopian novel")
-
-        db.add_all([author1, author2, reader1, reader9999, book1, book2])
-        db.flush()
-        reader1.books_read.append(book1)
-        db.commit()
-
-        # 5. Yield ready session
-        yield db
+# -------------------------------
+# FastAPI Test Client Fixtures
+# -------------------------------
+@contextmanager
+def _client_for(session: Session) -> Generator[TestClient, None, None]:
+    """Provides TestClient with get_db overridden to the given session."""
+
+    def override_get_db():
+        yield session
 
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        with TestClient(app) as test_client:
+            yield test_client
     finally:
-        # 6. Teardown DB
-        db.close()
-        Base.metadata.drop_all(bind=db_engine)
+        app.dependency_overrides.clear()
 
-# -------------------------------
-# FastAPI Test Client Fixture
-# -------------------------------
 @pytest.fixture(scope="function")
 def client(db) -> Generator[TestClient, None, None]:
     """Provides TestClient with test DB overrides."""
+    with _client_for(db) as test_client:
+        yield test_client
 
-    def override_get_db():
+@pytest.fixture(scope="function")
+def medium_client(medium_db) -> Generator[TestClient, None, None]:
+    """Provides TestClient backed by the medium dataset."""
+    with _client_for(medium_db) as test_client:
+        yield test_client
+
+# -------------------------------
+# Query Budget Helper
+# -------------------------------
+@pytest.fixture
+def assert_max_queries():
+    """
+    Returns a context manager failing the test if the block runs more than
+    ``n`` SQL statements (transaction control statements are not counted).
+    """
+
+    @contextmanager
+    def _assert_max_queries(n: int):
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", _record)
         try:
-            yield db
+            yield statements
         finally:
-            pass
+            event.remove(Engine, "before_cursor_execute", _record)
+        # Exclude transaction control emitted by the SAVEPOINT fixtures
+        executed = [s for s in statements if not s.upper().startswith(("BEGIN", "SAVEPOINT", "RELEASE", "ROLLBACK"))]
+        assert len(executed) <= n, (
+            f"Expected at most {n} queries, got {len(executed)}:\n" + "\n".join(executed)
+        )
 
-    app.dependency_overrides[get_db] = override_get_db
+    return _assert_max_queries
 
-    with TestClient(app) as test_client:
-        yield test_client
-
-    app.dependency_overrides.clear()
+# -------------------------------
+# Concurrency Helper
+# -------------------------------
+@pytest.fixture
+def wait_until():
+    """
+    Returns a function polling ``predicate`` until it holds, failing the test
+    after ``timeout`` seconds. From async code, run it with asyncio.to_thread.
+    """
+
+    def _wait_until(predicate, timeout: float = 5.0):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            assert time.monotonic() < deadline, "Timed out waiting for condition"
+            time.sleep(0.01)
+
+    return _wait_until
@@ -0,0 +1,92 @@
+# backend/tests/test_admission.py
+
+import asyncio
+import httpx
+
+from app import api, database
+from app.admission import AdmissionControlMiddleware, RouteClass
+
+# -------------------------------
+# Admission Control Tests
+# -------------------------------
+
+def _gated_app(release: asyncio.Event, started: list):
+    """Minimal ASGI app that holds every request until released."""
+
+    async def app(scope, receive, send):
+        started.append(scope["path"])
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return app
+
+def _run(route_class, request_count, hold_seconds=0.2):
+    async def scenario():
+        release, started = asyncio.Event(), []
+        app = AdmissionControlMiddleware(_gated_app(release, started), [route_class])
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            requests = [asyncio.create_task(client.get("/heavy")) for _ in range(request_count)]
+            await asyncio.sleep(hold_seconds)
+            release.set()
+            return await asyncio.gather(*requests)
+
+    return asyncio.run(scenario())
+
+def test_requests_beyond_queue_are_shed():
+    policy = RouteClass(name="test", paths=("/heavy",), max_concurrency=1, max_queue=1, max_wait=5.0)
+    responses = _run(policy, request_count=4)
+    statuses = sorted(r.status_code for r in responses)
+    assert statuses == [200, 200, 503, 503]
+    rejected = next(r for r in responses if r.status_code == 503)
+    assert int(rejected.headers["retry-after"]) >= 1
+    assert rejected.json()["reason"] == "queue_full"
+
+def test_queued_requests_time_out_at_deadline():
+    policy = RouteClass(name="test", paths=("/heavy",), max_concurrency=1, max_queue=5,
+                        max_wait=0.05, initial_service_time=0.01)
+    responses = _run(policy, request_count=2)
+    assert sorted(r.status_code for r in responses) == [200, 503]
+
+def test_mixed_traffic_stays_within_the_pool():
+    assert api.REQUEST_DB_SLOTS + api.BACKGROUND_DB_SESSIONS <= api.POOL_CAPACITY
+    paths = ["/dashboardData", "/authors/", "/genres/", "/books/", "/readers/1/stats"] * 12
+
+    async def scenario():
+        release, in_flight, peak = asyncio.Event(), [0], [0]
+
+        async def app(scope, receive, send):
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+            await release.wait()
+            in_flight[0] -= 1
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        transport = httpx.ASGITransport(app=AdmissionControlMiddleware(app, api.ADMISSION_ROUTE_CLASSES))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            requests = [asyncio.create_task(client.get(path)) for path in paths]
+            await asyncio.sleep(0.2)
+            release.set()
+            await asyncio.gather(*requests)
+        return peak[0]
+
+    assert asyncio.run(scenario()) == api.REQUEST_DB_SLOTS
+
+def test_unmatched_paths_bypass_limits(client):
+    response = client.get("/")
+    assert response.status_code == 200
+
+def test_metrics_reports_admission_decisions(client):
+    client.get("/books/")
+    metrics = client.get("/metrics").json()
+    assert metrics["admission"]["cheap.admitted"] >= 1
+    assert "heavy.in_flight" in metrics["admission"]
+
+def test_pool_sizing_only_applies_to_queue_pools():
+    assert database._pool_options("sqlite://") == {}
+    assert database._pool_options("sqlite:///:memory:") == {}
+    assert database._pool_options("sqlite:///./library.db") == {
+        "pool_size": database.POOL_SIZE, "max_overflow": database.POOL_MAX_OVERFLOW,
+    }
@@ -0,0 +1,88 @@
+# backend/tests/test_analytics.py
+
+import os
+import threading
+from collections import Counter
+from sqlalchemy import select
+
+from app import analytics, models
+from app.api import app, get_analytics_snapshot
+
+# -------------------------------
+# Columnar Snapshot Tests
+# -------------------------------
+
+def _reading_events(db):
+    return db.execute(
+        select(models.book_readers.c.reader_id, models.Book.author_id, models.Book.genre,
+               models.Book.pages, models.Book.reading_time, models.book_readers.c.read_at)
+        .join(models.Book, models.Book.id == models.book_readers.c.book_id)
+    ).all()
+
+def test_snapshot_aggregates_match_sql(medium_db, tmp_path):
+    directory = str(tmp_path / "snapshot")
+    metadata = analytics.build_snapshot(medium_db, directory)
+    snapshot = analytics.load_snapshot(directory)
+    events = _reading_events(medium_db)
+    assert metadata["row_count"] == len(events)
+
+    genre_months = Counter((e.genre, e.read_at.strftime("%Y-%m")) for e in events)
+    assert {(r["genre"], r["month"]): r["reads"] for r in snapshot.reads_per_genre_per_month()} == genre_months
+
+    assert snapshot.reading_time_totals()["total_reading_time"] == sum(e.reading_time for e in events)
+
+    pages = Counter()
+    for e in events:
+        pages[e.reader_id] += e.pages
+    top_reader = snapshot.pages_per_reader(limit=1)[0]
+    assert top_reader["pages_read"] == max(pages.values())
+
+    shares = snapshot.author_market_share(limit=1000)
+    assert sum(s["reads"] for s in shares) == len(events)
+    assert abs(sum(s["share"] for s in shares) - 1.0) < 1e-9
+
+def test_load_snapshot_missing_directory(tmp_path):
+    assert analytics.load_snapshot(str(tmp_path / "missing")) is None
+
+def test_rebuild_swaps_versions_and_prunes_old_ones(db, tmp_path):
+    directory = str(tmp_path / "snapshot")
+    for _ in range(4):
+        analytics.build_snapshot(db, directory)
+    versions = sorted(name for name in os.listdir(directory) if name.startswith(analytics.VERSION_PREFIX))
+    assert len(versions) == 2  # Current plus the previous one
+    with open(os.path.join(directory, analytics.CURRENT_FILE)) as f:
+        assert f.read() == max(versions, key=lambda name: int(name[1:]))
+
+def test_readers_see_a_complete_snapshot_during_rebuilds(db, tmp_path):
+    directory = str(tmp_path / "snapshot")
+    analytics.build_snapshot(db, directory)
+    stop, failures = threading.Event(), []
+
+    def read_continuously():
+        while not stop.is_set():
+            try:
+                snapshot = analytics.load_snapshot(directory)
+                assert snapshot is not None
+                assert int(snapshot.columns["book_id"].sum()) > 0
+                assert sum(r["reads"] for r in snapshot.reads_per_genre_per_month()) == snapshot.metadata["row_count"]
+            except Exception as e:  # Collected so the main thread can fail the test
+                failures.append(e)
+
+    reader = threading.Thread(target=read_continuously)
+    reader.start()
+    try:
+        for _ in range(10):
+            analytics.build_snapshot(db, directory)
+    finally:
+        stop.set()
+        reader.join()
+    assert failures == []
+
+def test_analytics_endpoint_serves_snapshot(client, db, tmp_path):
+    directory = str(tmp_path / "snapshot")
+    analytics.build_snapshot(db, directory)
+    app.dependency_overrides[get_analytics_snapshot] = lambda: analytics.load_snapshot(directory)
+    response = client.get("/analytics/author-share")
+    assert response.status_code == 200
+    assert response.json()[0]["author_name"] == "J.K. Rowling"
+    assert response.json()[0]["share"] == 1.0
@@ -1,5 +1,10 @@
 # backend/tests/test_api.py
 
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.instrumentation import QUERY_COUNT_HEADER, QueryCountMiddleware
+
 # -------------------------------
 # API Endpoint Tests
 # -------------------------------
@@ -55,3 +60,42 @@ def test_dashboard(client):
     assert "user_top_authors" in data
     assert "books_read" in data
     assert data["reader_id"] == 1
+
+def test_query_count_header(client):
+    response = client.get("/books/")
+    assert response.status_code == 200
+    assert int(response.headers["x-db-queries"]) >= 1
+    assert float(response.headers["x-db-time-ms"]) >= 0
+
+def test_query_count_header_is_opt_in():
+    bare = FastAPI()
+    bare.get("/")(lambda: {})
+    bare.add_middleware(QueryCountMiddleware)
+    response = TestClient(bare).get("/")
+    assert response.status_code == 200
+    assert QUERY_COUNT_HEADER not in response.headers
+
+def test_reader_stats(client):
+    response = client.get("/readers/1/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["books_read_count"] == 1
+    assert data["total_pages"] == 320
+    assert data["genres"] == {"Fantasy": 1}
+    assert sum(data["reads_per_month"].values()) == 1
+
+def test_reader_stats_not_found(client):
+    assert client.get("/readers/424242/stats").status_code == 404
+
+def test_record_read_invalidates_stats(client):
+    assert client.get("/readers/9999/stats").json()["books_read_count"] == 0
+    response = client.post("/readers/9999/reads", json={"book_id": 2, "read_at": "2024-03-05T10:00:00"})
+    assert response.status_code == 201
+    assert response.json()["reads_per_month"] == {"2024-03": 1}
+    stats = client.get("/readers/9999/stats").json()
+    assert stats["books_read_count"] == 1
+    assert stats["genres"] == {"Dystopian": 1}
+
+def test_record_read_conflicts_and_missing(client):
+    assert client.post("/readers/1/reads", json={"book_id": 1}).status_code == 409
+    assert client.post("/readers/1/reads", json={"book_id": 424242}).status_code == 404
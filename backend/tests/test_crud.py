@@ -1,6 +1,12 @@
 # backend/tests/test_crud.py
 
-from app import crud, models
+from collections import Counter
+from sqlalchemy import create_engine, inspect, text
+
+from app import crud
+from app.database import ensure_indexes
+from app.models import Base
+from app.readmodels import AuthorRow, BookRow, ReaderRow
 
 # -------------------------------
 # CRUD Layer Tests
@@ -15,13 +21,13 @@ def test_get_most_popular_books(db):
 def test_get_most_popular_author(db):
     author = crud.get_most_popular_author(db)
     assert author is not None
-    assert hasattr(author, "books")
+    assert author.books_count == 1
     assert author.name == "J.K. Rowling"
 
 def test_get_reader_top_authors(db):
     top_authors = crud.get_reader_top_authors(db, reader_id=1)
     assert len(top_authors) > 0
-    assert all(isinstance(a, models.Author) for a in top_authors)
+    assert all(isinstance(a, AuthorRow) for a in top_authors)
     assert top_authors[0].name == "J.K. Rowling"
 
 def test_get_books(db):
@@ -34,11 +40,85 @@ def test_get_books(db):
 def test_get_authors(db):
     authors = crud.get_authors(db)
     assert len(authors) == 2
-    assert all(hasattr(a, "total_readers") for a in authors)
-    assert all(hasattr(a, "books_count") for a in authors)
+    assert all(isinstance(a, AuthorRow) for a in authors)
+    assert [(a.books_count, a.total_readers) for a in authors] == [(1, 1), (1, 0)]
 
 def test_get_reader_with_stats(db):
     reader = crud.get_reader_with_stats(db, reader_id=1)
     assert reader is not None
     assert reader.books_read_count == 1
     assert reader.name == "Alice"
+
+def test_iter_reader_digests_by_ids(db):
+    digests = list(crud.iter_reader_digests(db, reader_ids=[9999, 1, 424242]))
+    assert [d.reader_id for d in digests] == [1, 9999]
+    alice, bob = digests
+    assert alice.books_read_count == 1
+    assert alice.total_pages == 320
+    assert alice.top_authors[0].name == "J.K. Rowling"
+    assert bob.books_read_count == 0
+    assert bob.top_authors == []
+
+def test_iter_reader_digests_matches_per_reader_queries(medium_db, assert_max_queries):
+    with assert_max_queries(7):  # Two chunks of three queries plus the empty keyset probe
+        digests = list(crud.iter_reader_digests(medium_db, id_range=(1, 200), chunk_size=100))
+    assert len(digests) == 200
+    for digest in digests[:20]:
+        history = crud.get_reader(medium_db, digest.reader_id).books_read
+        per_author = Counter(book.author.id for book in history)
+        assert digest.books_read_count == len(history)
+        assert digest.total_pages == sum(book.pages for book in history)
+        assert [a.books_read for a in digest.top_authors] == sorted(per_author.values(), reverse=True)[:3]
+        assert all(per_author[a.id] == a.books_read for a in digest.top_authors)
+
+def test_read_paths_return_read_models(db):
+    books = crud.get_books(db)
+    assert all(isinstance(b, BookRow) for b in books)
+    assert books[0].readers_count == 1
+    assert books[1].readers_count == 0
+    reader = crud.get_reader(db, reader_id=1)
+    assert isinstance(reader, ReaderRow)
+    assert reader.books_read[0].author.name == "J.K. Rowling"
+    assert not hasattr(reader, "__dict__")  # Slotted, no per-instance dict
+    assert crud.get_reader(db, reader_id=424242) is None
+
+def test_get_books_pagination_is_stable(medium_db):
+    first, second = crud.get_books(medium_db, skip=0, limit=50), crud.get_books(medium_db, skip=50, limit=50)
+    assert [b.id for b in first + second] == list(range(1, 101))
+
+class _WriteBeforeSecondQuery:
+    """Session proxy that runs ``write`` just before the wrapped code's second execute()."""
+
+    def __init__(self, db, write):
+        self._db, self._write, self._calls = db, write, 0
+
+    def execute(self, *args, **kwargs):
+        self._calls += 1
+        if self._calls == 2:
+            self._write()
+        return self._db.execute(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+def test_reader_stats_computed_across_a_write_are_not_cached(db):
+    interleaved = _WriteBeforeSecondQuery(db, lambda: crud.record_read(db, 9999, 2))
+    stale = crud.get_reader_stats(interleaved, 9999)
+    assert stale.books_read_count == 0  # Totals were read before the write committed
+    assert crud.get_reader_stats(db, 9999).books_read_count == 1
+
+def test_reader_stats_invalidation_tracking_is_bounded(db):
+    for book_id in range(1, 6):
+        crud.record_read(db, 9999, book_id)
+        crud.get_reader_stats(db, 9999)
+    crud.invalidate_reader_stats(12345)  # Never computed; nothing to remember
+    assert crud._reader_stats_in_flight == {}
+
+def test_ensure_indexes_adds_indexes_to_existing_tables():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_book_readers_reader_id"))
+    ensure_indexes(engine)
+    ensure_indexes(engine)  # Idempotent once the index exists
+    assert "ix_book_readers_reader_id" in {i["name"] for i in inspect(engine).get_indexes("book_readers")}
@@ -0,0 +1,36 @@
+# backend/tests/test_loadgen.py
+
+import random
+import pytest
+
+from app import loadgen
+
+# -------------------------------
+# Load Harness Tests
+# -------------------------------
+
+def test_parse_mix():
+    mix = loadgen.parse_mix("dashboard=1,books=4,authors")
+    assert mix == {"dashboard": 1.0, "books": 4.0, "authors": 1.0}
+
+def test_parse_mix_rejects_unknown_endpoint():
+    with pytest.raises(ValueError):
+        loadgen.parse_mix("readers=1")
+
+def test_build_books_path_varies_pagination():
+    path = loadgen.build_request_path("books", random.Random(0), books_total=50)
+    assert path.startswith("/books/?skip=")
+    assert "limit=" in path
+
+def test_build_books_path_without_known_total_keeps_first_page():
+    path = loadgen.build_request_path("books", random.Random(0), books_total=None)
+    assert path.startswith("/books/?limit=")
+
+def test_report_without_query_headers_shows_no_query_count():
+    stats = loadgen.EndpointStats(latencies=[0.01])
+    assert loadgen.format_report({"books": stats}, 1.0).splitlines()[2].endswith("n/a")
+
+def test_endpoint_stats_percentiles():
+    stats = loadgen.EndpointStats(latencies=[i / 1000 for i in range(1, 101)])
+    assert stats.percentile(50) == pytest.approx(50.0)
+    assert stats.percentile(99) == pytest.approx(99.0)
@@ -0,0 +1,99 @@
+# backend/tests/test_profiling.py
+
+import os
+import threading
+import time
+
+import pytest
+
+from app.api import profiler
+from app.instrumentation import QUERY_COUNT_HEADER
+from app.profiling import PROFILE_ID_HEADER, RequestProfiler, StackSampler
+
+# -------------------------------
+# Profiling Fixtures
+# -------------------------------
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    """Point the API's profiler at a temporary directory and allow the test client."""
+    monkeypatch.setattr(profiler, "directory", str(tmp_path))
+    monkeypatch.setattr(profiler, "allowlist", {"testclient"})
+    monkeypatch.setattr(profiler, "sample_rate", 0.0)
+    monkeypatch.setattr(profiler, "interval", 0.001)
+    return tmp_path
+
+# -------------------------------
+# Request Profiling Tests
+# -------------------------------
+
+def test_unflagged_requests_are_not_profiled(client, profiles):
+    response = client.get("/books/")
+    assert response.status_code == 200
+    assert PROFILE_ID_HEADER not in response.headers
+    assert os.listdir(profiles) == []
+
+def test_flagged_request_stores_profile_with_sql(client, profiles):
+    response = client.get("/books/", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers[PROFILE_ID_HEADER]
+
+    listed = client.get("/profiles/").json()
+    assert [p["id"] for p in listed] == [profile_id]
+
+    detail = client.get(f"/profiles/{profile_id}").json()
+    assert detail["path"] == "/books/"
+    assert detail["status"] == 200
+    assert detail["query_count"] == int(response.headers[QUERY_COUNT_HEADER])
+    assert len(detail["statements"]) == detail["query_count"]
+    assert all(s["start_ms"] >= 0 for s in detail["statements"])
+    assert any(s["statement"].startswith("SELECT") for s in detail["statements"])
+
+    speedscope = client.get(f"/profiles/{profile_id}/speedscope").json()
+    assert "frames" in speedscope["shared"]
+    for thread_profile in speedscope["profiles"]:
+        assert len(thread_profile["samples"]) == len(thread_profile["weights"])
+
+def test_query_flag_triggers_profiling(client, profiles):
+    response = client.get("/authors/?profile=1")
+    assert PROFILE_ID_HEADER in response.headers
+
+def test_flag_from_unlisted_client_is_ignored(client, profiles, monkeypatch):
+    monkeypatch.setattr(profiler, "allowlist", {"10.0.0.1"})
+    response = client.get("/books/", headers={"X-Profile": "1"})
+    assert PROFILE_ID_HEADER not in response.headers
+    assert client.get("/profiles/").status_code == 403
+
+def test_no_client_is_allowlisted_by_default(tmp_path):
+    default = RequestProfiler(directory=str(tmp_path))
+    assert not default.is_allowed("127.0.0.1")
+    assert not default.is_allowed("::1")
+
+def test_retention_keeps_newest_profiles(client, profiles, monkeypatch):
+    monkeypatch.setattr(profiler, "retention", 2)
+    ids = [client.get("/", headers={"X-Profile": "1"}).headers[PROFILE_ID_HEADER] for _ in range(3)]
+    assert profiler.list_ids() == ids[:0:-1]
+    assert len(os.listdir(profiles)) == 4
+    assert client.get(f"/profiles/{ids[0]}").status_code == 404
+
+def test_malformed_profile_id_is_not_found(client, profiles):
+    assert client.get("/profiles/..%2F..%2Fetc").status_code == 404
+
+def test_sampler_captures_registered_threads():
+    def busy_work(stop):
+        while not stop.is_set():
+            sum(range(1000))
+
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_work, args=(stop,))
+    worker.start()
+    sampler = StackSampler({worker.ident}, interval=0.001)
+    sampler.start()
+    time.sleep(0.05)
+    sampler.stop()
+    stop.set()
+    worker.join()
+
+    assert list(sampler.samples) == [worker.ident]
+    assert "busy_work" in {name for name, _, _ in sampler.frames}
+    assert sampler.top_frames()[0]["samples"] > 0
@@ -0,0 +1,46 @@
+# backend/tests/test_query_budgets.py
+
+from app import crud
+
+# -------------------------------
+# Query Budget Tests (medium dataset)
+# -------------------------------
+# Budgets are upper bounds on SQL statements per call; an N+1 regression on the
+# medium dataset exceeds them by an order of magnitude.
+
+def test_books_endpoint_query_budget(medium_client, assert_max_queries):
+    with assert_max_queries(2):
+        response = medium_client.get("/books/?limit=1000")
+    assert response.status_code == 200
+    assert len(response.json()) == 400
+
+def test_authors_endpoint_query_budget(medium_client, assert_max_queries):
+    with assert_max_queries(2):
+        response = medium_client.get("/authors/")
+    assert response.status_code == 200
+    assert len(response.json()) == 40
+
+def test_dashboard_endpoint_query_budget(medium_client, assert_max_queries):
+    with assert_max_queries(6):
+        response = medium_client.get("/dashboardData")
+    assert response.status_code == 200
+    assert response.json()["reader_id"] == 1
+
+def test_query_count_header_matches_budget(medium_client):
+    response = medium_client.get("/authors/")
+    assert int(response.headers["x-db-queries"]) <= 2
+
+def test_get_authors_query_budget(medium_db, assert_max_queries):
+    with assert_max_queries(1):
+        authors = crud.get_authors(medium_db)
+        assert sum(a.total_readers for a in authors) > 0
+
+def test_get_reader_top_authors_query_budget(medium_db, assert_max_queries):
+    with assert_max_queries(1):
+        crud.get_reader_top_authors(medium_db, reader_id=1)
+
+def test_reader_stats_query_budget(medium_db, assert_max_queries):
+    with assert_max_queries(2):
+        stats = crud.get_reader_stats(medium_db, reader_id=1)
+    with assert_max_queries(0):
+        assert crud.get_reader_stats(medium_db, reader_id=1) is stats  # Served from cache
@@ -0,0 +1,96 @@
+# backend/tests/test_scheduler.py
+
+import asyncio
+import time
+
+from app import crud
+from app.scheduler import PrecomputeScheduler, RefreshJob
+
+# -------------------------------
+# Precompute Scheduler Tests
+# -------------------------------
+
+class FakeSession:
+    def close(self):
+        pass
+
+def test_jobs_run_staggered_and_expose_stats(wait_until):
+    calls = []
+
+    async def scenario():
+        scheduler = PrecomputeScheduler(
+            FakeSession,
+            [RefreshJob("a", lambda db: calls.append(("a", time.monotonic())) or "A", interval=60),
+             RefreshJob("b", lambda db: calls.append(("b", time.monotonic())) or "B", interval=60)],
+            stagger=0.1,
+        )
+        await scheduler.start()
+        await asyncio.to_thread(wait_until, lambda: scheduler.has("a") and scheduler.has("b"))
+        stats = scheduler.stats()
+        await scheduler.stop()
+        return scheduler, stats
+
+    scheduler, stats = asyncio.run(scenario())
+    assert scheduler.get("a") == "A" and scheduler.get("b") == "B"
+    assert calls[1][1] - calls[0][1] >= 0.09
+    assert stats["a.runs"] == 1 and stats["a.last_error"] is None
+    assert stats["b.last_duration_ms"] >= 0
+
+def test_data_version_change_triggers_refresh(wait_until):
+    version = {"value": 1}
+    runs = []
+
+    async def scenario():
+        scheduler = PrecomputeScheduler(
+            FakeSession,
+            [RefreshJob("counts", lambda db: runs.append(version["value"]) or version["value"],
+                        interval=60, min_interval=0)],
+            version_fn=lambda db: version["value"],
+            check_interval=0.02,
+        )
+        await scheduler.start()
+        await asyncio.to_thread(wait_until, lambda: scheduler.get("counts") == 1)
+        await asyncio.sleep(0.1)
+        assert len(runs) == 1  # Unchanged data does not refresh before the interval
+        version["value"] = 2
+        await asyncio.to_thread(wait_until, lambda: scheduler.get("counts") == 2)
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+
+def test_failed_refresh_keeps_previous_value(wait_until):
+    outcomes = iter(["first", RuntimeError("db down")])
+
+    def compute(db):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def scenario():
+        scheduler = PrecomputeScheduler(FakeSession, [RefreshJob("job", compute, interval=60, min_interval=0)])
+        await scheduler.start()
+        await asyncio.to_thread(wait_until, lambda: scheduler.has("job"))
+        scheduler.trigger("job")
+        await asyncio.to_thread(wait_until, lambda: scheduler.stats()["job.errors"] == 1)
+        await scheduler.stop()
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.get("job") == "first"
+    assert scheduler.stats()["job.last_error"] == "db down"
+
+def test_get_data_version_changes_on_new_read(db):
+    before = crud.get_data_version(db)
+    reader = db.get(crud.Reader, 9999)
+    reader.books_read.append(db.get(crud.Book, 2))
+    db.flush()
+    assert crud.get_data_version(db) != before
+
+def test_trending_and_genre_endpoints(client):
+    trending = client.get("/books/trending")
+    assert trending.status_code == 200
+    assert trending.json()[0]["title"] == "HP and the Sorcerer's Stone"
+    genres = {g["genre"]: g for g in client.get("/genres/").json()}
+    assert genres["Fantasy"] == {"genre": "Fantasy", "books_count": 1, "reads_count": 1}
+    assert genres["Dystopian"]["reads_count"] == 0
@@ -0,0 +1,92 @@
+# backend/tests/test_singleflight.py
+
+import threading
+
+from app.singleflight import SingleFlight
+
+# -------------------------------
+# Single-Flight Coalescing Tests
+# -------------------------------
+
+def slow_query_factory():
+    """Build a query function that counts invocations and blocks until released."""
+
+    def slow_query(db, limit=10):
+        slow_query.calls += 1
+        slow_query.release.wait(timeout=5)
+        return [slow_query.calls] * limit
+
+    slow_query.calls = 0
+    slow_query.release = threading.Event()
+    return slow_query
+
+def _call_concurrently(flight, fn, count, **params):
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(flight.call(None, fn, **params))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+def test_concurrent_callers_share_one_computation(wait_until):
+    flight, query = SingleFlight(), slow_query_factory()
+    threads, results, errors = _call_concurrently(flight, query, 8, limit=2)
+    wait_until(lambda: flight.stats["coalesced"] == 7)
+    query.release.set()
+    for thread in threads:
+        thread.join()
+    assert query.calls == 1
+    assert results == [[1, 1]] * 8
+    assert not errors
+
+def test_different_parameters_are_not_coalesced():
+    flight, query = SingleFlight(), slow_query_factory()
+    query.release.set()
+    assert flight.call(None, query, limit=1) == [1]
+    assert flight.call(None, query, limit=2) == [2, 2]
+
+def test_errors_propagate_to_all_waiters(wait_until):
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def failing(db):
+        calls.append(1)
+        release.wait(timeout=5)
+        raise RuntimeError("boom")
+
+    threads, results, errors = _call_concurrently(flight, failing, 4)
+    wait_until(lambda: flight.stats["coalesced"] == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(errors) == 4 and not results
+    assert all(isinstance(e, RuntimeError) for e in errors)
+
+def test_stale_while_revalidate_serves_previous_result(wait_until):
+    flight = SingleFlight(session_factory=lambda: type("Session", (), {"close": lambda self: None})(),
+                          ttl=0, stale_ttl=60)
+    query = slow_query_factory()
+    query.release.set()
+    assert flight.call(None, query, limit=1) == [1]
+
+    query.release.clear()
+    assert flight.call(None, query, limit=1) == [1]  # Stale result, refresh started
+    assert flight.call(None, query, limit=1) == [1]  # Refresh still running, not restarted
+    assert flight.stats["refreshes"] == 1
+    query.release.set()
+    wait_until(lambda: flight.stats["computed"] == 2)
+    assert flight.call(None, query, limit=1) == [2]
+
+def test_dashboard_uses_shared_queries(client):
+    response = client.get("/dashboardData")
+    assert response.status_code == 200
+    assert response.json()["most_popular_books"][0]["title"] == "HP and the Sorcerer's Stone"
+    assert response.json()["most_popular_author"]["name"] == "J.K. Rowling"
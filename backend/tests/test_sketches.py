@@ -0,0 +1,124 @@
+# backend/tests/test_sketches.py
+
+from collections import defaultdict
+import numpy as np
+from sqlalchemy import select
+
+from app import crud, models, sketches
+from app.seed import seed_synthetic_data
+from app.sketches import HyperLogLog
+
+# -------------------------------
+# HyperLogLog Sketch Tests
+# -------------------------------
+
+def test_estimate_within_error_bound():
+    sketch = HyperLogLog()
+    sketch.add_many(np.arange(1, 200_001))
+    assert abs(sketch.count() - 200_000) / 200_000 < 0.05  # ~3 standard errors at p=12
+
+def test_no_bias_around_the_small_range_switchover():
+    # The raw HyperLogLog estimator is biased near 2.5 * m (~10k at p=12)
+    errors = []
+    for seed in range(10):
+        ids = np.random.default_rng(seed).choice(10**9, size=10_000, replace=False)
+        sketch = HyperLogLog()
+        sketch.add_many(ids)
+        errors.append((sketch.count() - 10_000) / 10_000)
+    assert abs(np.mean(errors)) < 0.01
+    assert max(abs(e) for e in errors) < 0.05
+
+def test_small_cardinalities_are_near_exact():
+    sketch = HyperLogLog()
+    sketch.add(*range(1, 101))
+    sketch.add(*range(1, 101))  # Duplicates do not count twice
+    assert abs(sketch.count() - 100) <= 5
+
+def test_merge_is_union_and_serialization_is_compact():
+    first, second, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    first.add_many(np.arange(0, 3000))
+    second.add_many(np.arange(2000, 5000))
+    union.add_many(np.arange(0, 5000))
+    first.merge(second)
+    assert np.array_equal(first.registers, union.registers)
+
+    tiny = HyperLogLog()
+    tiny.add(42)
+    assert len(tiny.to_bytes()) < 64
+    assert np.array_equal(HyperLogLog.from_bytes(union.to_bytes()).registers, union.registers)
+
+def test_rebuild_matches_exact_counts(medium_db):
+    assert sketches.rebuild(medium_db) > 0
+    exact = crud.get_most_popular_books(medium_db, limit=5, approximate=False)
+    approx = crud.get_most_popular_books(medium_db, limit=5, approximate=True)
+    for exact_book, approx_book in zip(exact, approx):
+        assert abs(exact_book.readers_count - approx_book.readers_count) <= max(2, exact_book.readers_count * 0.05)
+
+    reads = medium_db.execute(select(models.book_readers.c.reader_id, models.Book.author_id)
+                              .join(models.Book, models.Book.id == models.book_readers.c.book_id)).all()
+    distinct_per_author = defaultdict(set)
+    for reader_id, author_id in reads:
+        distinct_per_author[author_id].add(reader_id)
+    for author in crud.get_authors(medium_db, approximate=True)[:10]:
+        expected = len(distinct_per_author[author.id])
+        assert abs(author.total_readers - expected) <= max(2, expected * 0.05)
+
+def test_window_estimates_merge_monthly_buckets(medium_db):
+    sketches.rebuild(medium_db)
+    rows = medium_db.execute(select(models.book_readers)).all()
+    months = sorted({row.read_at.strftime("%Y-%m") for row in rows})
+    since, until = months[2], months[5]
+    window = defaultdict(set)
+    for row in rows:
+        if since <= row.read_at.strftime("%Y-%m") <= until:
+            window[row.book_id].add(row.reader_id)
+    estimates = sketches.estimate_distinct_readers(medium_db, sketches.BOOK_SCOPE, since=since, until=until)
+    assert estimates.keys() == window.keys()
+    errors = [abs(estimates[b] - len(readers)) for b, readers in window.items()]
+    assert max(errors) <= 2
+    assert sum(errors) / len(errors) < 0.1
+
+def test_approximate_falls_back_to_exact_without_sketches(db):
+    books = crud.get_most_popular_books(db, approximate=True)
+    assert books[0].readers_count == 1
+
+def test_record_read_updates_sketches(db, monkeypatch):
+    monkeypatch.setattr(sketches, "APPROXIMATE_COUNTS", True)
+    sketches.rebuild(db)
+    assert crud.record_read(db, reader_id=9999, book_id=1)
+    assert sketches.estimate_distinct_readers(db, sketches.BOOK_SCOPE, [1]) == {1: 2}
+    assert sketches.estimate_distinct_readers(db, sketches.AUTHOR_SCOPE, [1]) == {1: 2}
+    assert crud.get_most_popular_author(db).total_readers == 2
+
+def test_record_read_keeps_sketches_current_while_disabled(db, monkeypatch):
+    monkeypatch.setattr(sketches, "APPROXIMATE_COUNTS", False)
+    sketches.rebuild(db)
+    assert crud.record_read(db, reader_id=9999, book_id=1)
+    monkeypatch.setattr(sketches, "APPROXIMATE_COUNTS", True)
+    assert crud.get_most_popular_author(db).total_readers == 2
+
+def test_record_read_skips_sketches_until_built(db):
+    assert crud.record_read(db, reader_id=9999, book_id=1)
+    assert not sketches.has_sketches(db)
+
+def test_reseeding_discards_sketches_of_the_old_dataset(db, monkeypatch):
+    monkeypatch.setattr(sketches, "APPROXIMATE_COUNTS", True)
+    sketches.rebuild(db)
+    seed_synthetic_data(db, authors=5, books=40, readers=60, reads_per_reader=5, seed=3)
+    assert not sketches.has_sketches(db)
+    approximate = crud.get_most_popular_books(db, limit=5, approximate=True)
+    exact = crud.get_most_popular_books(db, limit=5, approximate=False)
+    assert [(b.id, b.readers_count) for b in approximate] == [(b.id, b.readers_count) for b in exact]
+
+def test_chunked_rebuild_matches_single_pass(medium_db):
+    def stored():
+        rows = medium_db.execute(select(models.ReaderSketch.scope, models.ReaderSketch.entity_id,
+                                        models.ReaderSketch.bucket, models.ReaderSketch.registers))
+        return {(scope, entity, bucket): HyperLogLog.from_bytes(data).registers.tobytes()
+                for scope, entity, bucket, data in rows}
+
+    written = sketches.rebuild(medium_db, chunk_rows=7)  # Most books span several chunks
+    chunked = stored()
+    assert sketches.rebuild(medium_db, chunk_rows=10**9) == written
+    assert stored() == chunked
+    assert {scope for scope, _, _ in chunked} == {sketches.BOOK_SCOPE, sketches.AUTHOR_SCOPE}